@@ -0,0 +1,89 @@
+"""Concurrency benchmark for the TECMFS controller.
+
+Runs several clients uploading and downloading at the same time while
+probing /status, so you can compare aggregate throughput and how much
+the controller stalls unrelated requests under load.
+
+Usage: python benchmark.py --clients 8 --size-kb 1024 --rounds 3
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+from api_client import CONTROLLER_URL
+
+def client_worker(size: int, rounds: int) -> Dict[str, float]:
+    """Uploads, downloads and deletes `rounds` random files, returning elapsed times."""
+    upload_time = 0.0
+    download_time = 0.0
+    session = requests.Session()
+    for i in range(rounds):
+        content = os.urandom(size)
+        start = time.perf_counter()
+        files = {'file': (f"bench_{threading.get_ident()}_{i}.bin", content, 'application/octet-stream')}
+        response = session.post(f"{CONTROLLER_URL}/upload", files=files, timeout=300)
+        response.raise_for_status()
+        upload_time += time.perf_counter() - start
+        file_id = response.json()["file_id"]
+
+        start = time.perf_counter()
+        response = session.get(f"{CONTROLLER_URL}/download/{file_id}", timeout=300)
+        response.raise_for_status()
+        download_time += time.perf_counter() - start
+        if response.content != content:
+            raise RuntimeError(f"Downloaded content for {file_id} does not match the upload")
+
+        session.delete(f"{CONTROLLER_URL}/files/{file_id}", timeout=300)
+    return {"upload": upload_time, "download": download_time}
+
+def probe_status(stop: threading.Event, latencies: List[float]):
+    """Measures /status latency until `stop` is set."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            requests.get(f"{CONTROLLER_URL}/status", timeout=60)
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for the TECMFS controller.")
+    parser.add_argument("--clients", type=int, default=8, help="Number of concurrent clients.")
+    parser.add_argument("--size-kb", type=int, default=1024, help="Size of each file in KB.")
+    parser.add_argument("--rounds", type=int, default=3, help="Files uploaded/downloaded per client.")
+    args = parser.parse_args()
+
+    size = args.size_kb * 1024
+    latencies: List[float] = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe_status, args=(stop, latencies), daemon=True)
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        results = list(executor.map(lambda _: client_worker(size, args.rounds), range(args.clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+
+    total_mb = size * args.rounds * args.clients / (1024 * 1024)
+    print(f"Clients: {args.clients}, files: {args.clients * args.rounds} x {args.size_kb} KB")
+    print(f"Wall time: {elapsed:.2f} s")
+    print(f"Aggregate upload+download throughput: {2 * total_mb / elapsed:.2f} MB/s")
+    print(f"Mean upload time per file: {statistics.mean(r['upload'] for r in results) / args.rounds:.3f} s")
+    print(f"Mean download time per file: {statistics.mean(r['download'] for r in results) / args.rounds:.3f} s")
+    if latencies:
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"/status latency under load: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {p99 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Caché LRU de bloques en memoria del controlador."""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class BlockCache:
+    """Bloques recientes indexados por ``block_id`` con un presupuesto en bytes.
+
+    Al superar ``max_bytes`` se descartan los bloques usados hace más tiempo
+    (LRU). Con ``max_bytes=0`` la caché queda desactivada. Los bloques son
+    inmutables mientras existe su archivo, así que solo hace falta invalidar
+    al borrarlo.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._blocks: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, block_id: str) -> Optional[bytes]:
+        """Devolver el bloque si está en caché y marcarlo como el más reciente."""
+        with self._lock:
+            data = self._blocks.get(block_id)
+            if data is None:
+                self._misses += 1
+                return None
+            self._blocks.move_to_end(block_id)
+            self._hits += 1
+            return data
+
+    def put(self, block_id: str, data: bytes):
+        """Guardar un bloque, descartando los menos recientes si no cabe."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._blocks.pop(block_id, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._blocks[block_id] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def invalidate(self, block_ids: Iterable[str]):
+        """Quitar de la caché los bloques indicados (p. ej. al borrar un archivo)."""
+        with self._lock:
+            for block_id in block_ids:
+                data = self._blocks.pop(block_id, None)
+                if data is not None:
+                    self._size -= len(data)
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos, fallos y descartes para ``/status/cache``."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_bytes": self.max_bytes,
+                "used_bytes": self._size,
+                "blocks": len(self._blocks),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
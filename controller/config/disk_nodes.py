@@ -0,0 +1,40 @@
+"""Lista de nodos de disco del arreglo a partir de la configuración."""
+import glob
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List
+
+_DISK_ID_PATTERN = re.compile(r"^(.+)_config\.xml$")
+
+
+def _natural_key(disk_id: str):
+    """Ordenar disk_2 antes que disk_10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", disk_id)]
+
+
+def load_disk_nodes(nodes: List[Dict], config_pattern: str, host: str) -> List[Dict[str, str]]:
+    """Nodos ``[{"id", "url"}]``: primero los de ``nodes`` y luego los de las XML.
+
+    Una configuración XML cuyo id o puerto ya aparece en ``nodes`` se ignora, así
+    los discos por defecto no se duplican al añadir ``disk_5_config.xml``.
+    """
+    result = [{"id": node["id"], "url": node["url"].rstrip("/")} for node in nodes]
+    known_ids = {node["id"] for node in result}
+    known_urls = {node["url"] for node in result}
+
+    from_xml = []
+    for path in glob.glob(config_pattern):
+        match = _DISK_ID_PATTERN.match(os.path.basename(path))
+        if not match or match.group(1) in known_ids:
+            continue
+        try:
+            port = int(ET.parse(path).getroot().find('server/port').text)
+        except (ET.ParseError, OSError, AttributeError, ValueError) as e:
+            print(f"Error leyendo la configuración del nodo {path}: {e}")
+            continue
+        url = f"http://{host}:{port}"
+        if url not in known_urls:
+            from_xml.append({"id": match.group(1), "url": url})
+            known_urls.add(url)
+    return result + sorted(from_xml, key=lambda node: _natural_key(node["id"]))
@@ -5,11 +5,17 @@ from typing import List
 HOST = "0.0.0.0"
 PORT = 8000
 DEBUG = True
+# Hilos para la E/S bloqueante del controlador (subidas, descargas, borrados)
+CONTROLLER_IO_WORKERS = 32
 
 # Configuración RAID 5
 BLOCK_SIZE = 4096  # 4KB
-NUM_DISKS = 4
-MIN_DISKS_FOR_RAID5 = 4
+MIN_DISKS_FOR_RAID5 = 3
+# Discos por franja (datos + paridad); 0 usa todos los del arreglo. Si es menor
+# que el número de nodos, las franjas se reparten por todo el arreglo (declustered)
+STRIPE_WIDTH = 0
+# Backend para el cálculo de paridad XOR: "auto", "numpy", "bigint" o "python"
+PARITY_BACKEND = "auto"
 
 # Configuración de Disk Nodes
 DISK_NODES = [
@@ -18,14 +24,78 @@ DISK_NODES = [
     {"id": "disk_3", "url": "http://localhost:8003", "port": 8003},
     {"id": "disk_4", "url": "http://localhost:8004", "port": 8004},
 ]
+# Configuraciones XML de los nodos de disco; los que no estén ya en DISK_NODES se
+# añaden al arreglo (id tomado del nombre: disk_5_config.xml -> disk_5)
+DISK_NODE_CONFIGS = os.path.join("disk_node", "disk_*_config.xml")
+DISK_NODE_HOST = "localhost"
+# Máximo de operaciones de bloque simultáneas por nodo de disco
+DISK_MAX_CONCURRENCY = 4
+# Conexiones keep-alive que se mantienen abiertas hacia cada nodo de disco
+DISK_POOL_SIZE = 8
+# Franjas que se leen por adelantado durante una descarga
+READ_WINDOW_STRIPES = 8
+# Franjas que se leen y codifican juntas durante una subida en streaming
+UPLOAD_CHUNK_STRIPES = 16
+# Colocación de franjas: peso de la fracción ocupada de cada disco y de su cola
+# de trabajo (en unidades de DISK_MAX_CONCURRENCY); por debajo de la tolerancia
+# se sigue la rotación de paridad y la franja no ocupa sitio en los metadatos
+PLACEMENT_SPACE_WEIGHT = 1.0
+PLACEMENT_LOAD_WEIGHT = 0.05
+PLACEMENT_TOLERANCE = 0.1
+# Lecturas cubiertas: si un bloque tarda más que el percentil típico de los discos,
+# se reconstruye con la paridad y se usa lo que llegue antes
+HEDGED_READS = True
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_DELAY = 0.005  # Segundos; evita cubrir por ruido cuando los discos son muy rápidos
+# Memoria máxima de la caché LRU de bloques del controlador (0 la desactiva)
+BLOCK_CACHE_BYTES = 64 * 1024 * 1024
+
+# Reconstrucción de discos: límites para no saturar a los clientes (0 = sin límite)
+REBUILD_MAX_BYTES_PER_SEC = 32 * 1024 * 1024
+REBUILD_MAX_IOPS = 2000
+REBUILD_PARALLEL_STRIPES = 8
+REBUILD_CHECKPOINT_FILE = "rebuild.checkpoint.json"
+# Bloques escritos con su disco caído, pendientes de resincronizar
+DIRTY_LOG_FILE = "dirty_stripes.log"
+# Nodos que sustituyen a discos reconstruidos ({disk_id: url})
+DISK_REPLACEMENTS_FILE = "disk_replacements.json"
+
+# Comprobación de salud de los discos en segundo plano
+HEALTH_CHECK_INTERVAL = 2.0  # Segundos entre rondas de comprobación
+HEALTH_CHECK_TIMEOUT = 1.0
+HEALTH_RECOVERY_SUCCESSES = 3  # Respuestas seguidas para volver a poner un disco en línea
+HEALTH_FAILURE_THRESHOLD = 2  # Fallos seguidos para marcar un disco fuera de línea
+# Un disco que vuelve ocupando menos de esta fracción de lo que dicen los metadatos
+# perdió sus datos: queda como "failed" hasta reconstruirlo
+DISK_DATA_LOSS_RATIO = 0.5
 
 # Configuración de almacenamiento
 METADATA_FILE = "metadata.json"
+# Journal de cambios de metadatos; se compacta en METADATA_FILE cada N registros
+METADATA_JOURNAL_FILE = "metadata.journal"
+METADATA_COMPACT_EVERY = 10000
+# Backend de metadatos: "journal" (JSON en memoria) o "sqlite" (consultas indexadas)
+METADATA_BACKEND = "journal"
+METADATA_DB_FILE = "metadata.db"
 TEMP_DIR = "temp"
+# Caché de archivos reconstruidos para descargas repetidas (0 la desactiva)
+FILE_CACHE_DIR = os.path.join(TEMP_DIR, "file_cache")
+FILE_CACHE_BYTES = 1024 * 1024 * 1024  # 1GB
 MAX_FILE_SIZE = 1024 * 1024 * 1024  # 1GB
 
-# Configuración de timeout para llamadas HTTP
+# Configuración de timeout para llamadas HTTP (tope de los timeouts adaptativos)
 HTTP_TIMEOUT = 30
+# Timeout adaptativo por disco: EWMA de la latencia + 4 desviaciones, acotado
+DISK_TIMEOUT_INITIAL = 5.0  # Segundos, hasta tener la primera respuesta
+DISK_TIMEOUT_MIN = 0.5
+DISK_CONNECT_TIMEOUT = 2.0
+# Reintentos por petición, con espera exponencial y aleatoria entre ellos
+DISK_RETRIES = 2
+DISK_RETRY_BACKOFF = 0.05  # Segundos de la primera espera
+DISK_RETRY_BACKOFF_MAX = 1.0
+# Cortocircuito: fallos seguidos para dejar de llamar a un disco y segundos hasta probar de nuevo
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 5.0
 
 # Configuración de logs
 LOG_LEVEL = "INFO"
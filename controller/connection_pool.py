@@ -0,0 +1,136 @@
+"""Pools de conexiones HTTP persistentes hacia los nodos de disco."""
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .resilience import AdaptiveTimeout, CircuitBreaker, CircuitOpenError, backoff_delay
+from .config.settings import (
+    HTTP_TIMEOUT, DISK_TIMEOUT_INITIAL, DISK_TIMEOUT_MIN, DISK_CONNECT_TIMEOUT,
+    DISK_RETRIES, DISK_RETRY_BACKOFF, DISK_RETRY_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+)
+
+# Respuestas del nodo que indican un problema pasajero y merecen reintento
+RETRYABLE_STATUS = (502, 503, 504)
+
+
+class DiskConnectionPool:
+    """Sesión keep-alive propia de un nodo de disco.
+
+    Reutiliza las conexiones TCP entre bloques en lugar de abrir una nueva por
+    cada petición, y lleva estadísticas de reutilización para ``/status/pools``.
+
+    Cada petición sin ``timeout`` explícito usa el timeout adaptativo del disco,
+    se reintenta con espera exponencial y aleatoria ante errores de conexión,
+    timeouts o respuestas 502/503/504, y pasa por el cortocircuito del nodo.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 8):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._lock = threading.Lock()
+        self._active_requests = 0
+        self._retries = 0
+        self._fast_failures = 0
+        self.timeout = AdaptiveTimeout(DISK_TIMEOUT_INITIAL, DISK_TIMEOUT_MIN, HTTP_TIMEOUT, DISK_CONNECT_TIMEOUT)
+        self.breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+    def request(self, method: str, path: str, timeout: Optional[float] = None, retries: int = DISK_RETRIES,
+                probe: bool = False, **kwargs) -> requests.Response:
+        """Hacer una petición al nodo reutilizando una conexión del pool.
+
+        ``probe=True`` (comprobaciones de salud) ignora el cortocircuito abierto:
+        es justo la petición que puede volver a cerrarlo.
+        """
+        attempt = 0
+        while True:
+            if not probe and not self.breaker.allow():
+                with self._lock:
+                    self._fast_failures += 1
+                raise CircuitOpenError(f"Cortocircuito abierto hacia {self.base_url}")
+            try:
+                response = self._send(method, path, timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if isinstance(e, requests.exceptions.Timeout) and timeout is None:
+                    self.timeout.record_timeout()
+                self.breaker.record_failure()
+                if attempt >= retries:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= retries:
+                    return response
+            attempt += 1
+            with self._lock:
+                self._retries += 1
+            time.sleep(backoff_delay(attempt, DISK_RETRY_BACKOFF, DISK_RETRY_BACKOFF_MAX))
+
+    def _send(self, method: str, path: str, timeout: Optional[float], **kwargs) -> requests.Response:
+        with self._lock:
+            self._active_requests += 1
+        try:
+            started = time.monotonic()
+            response = self.session.request(
+                method, f"{self.base_url}{path}",
+                timeout=timeout if timeout is not None else self.timeout.timeouts(), **kwargs
+            )
+            if timeout is None and response.status_code < 500:
+                self.timeout.record(time.monotonic() - started)
+            return response
+        finally:
+            with self._lock:
+                self._active_requests -= 1
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def stats(self) -> Dict:
+        """Estadísticas del pool: peticiones, conexiones abiertas y tasa de reutilización."""
+        requests_sent = 0
+        connections_created = 0
+        idle_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_created += pool.num_connections
+            # Los huecos libres del pool se representan con None
+            idle_connections += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        reuse_ratio = 1 - connections_created / requests_sent if requests_sent else 0.0
+        smoothed = self.timeout.smoothed()
+        return {
+            "pool_size": self.pool_size,
+            "requests": requests_sent,
+            "connections_created": connections_created,
+            "open_connections": idle_connections + self._active_requests,
+            "active_requests": self._active_requests,
+            "reuse_ratio": round(max(reuse_ratio, 0.0), 4),
+            "latency_ewma_ms": round(smoothed * 1000, 2) if smoothed is not None else None,
+            "timeout_ms": round(self.timeout.current() * 1000, 2),
+            "retries": self._retries,
+            "circuit_state": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "fast_failures": self._fast_failures,
+        }
+
+    def close(self):
+        """Cerrar todas las conexiones del pool."""
+        self.session.close()
@@ -0,0 +1,99 @@
+"""Registro persistente de bloques escritos en modo degradado."""
+import json
+import os
+import threading
+from typing import Dict, Iterable, List
+
+from .stripe_index import DiskBlockRef
+
+
+class DirtyStripeLog:
+    """Bloques que no llegaron a su disco porque estaba caído al escribirlos.
+
+    Cada cambio se añade como una línea JSON (con fsync) a ``path``, y en
+    memoria se guarda ``{disk_id: {block_id: DiskBlockRef}}``. Cuando el disco
+    vuelve solo hay que regenerar esas franjas en lugar del disco entero; al
+    vaciarse un disco el archivo se reescribe de forma atómica para no crecer
+    sin límite.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._dirty: Dict[str, Dict[str, DiskBlockRef]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """Reaplicar el registro guardado e ignorar una última línea incompleta."""
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    blocks = self._dirty.setdefault(record['disk_id'], {})
+                    if record['op'] == 'dirty':
+                        blocks[record['block_id']] = DiskBlockRef(
+                            record['file_id'], record['stripe_index'], record['block_id']
+                        )
+                    else:
+                        blocks.pop(record['block_id'], None)
+        self._rewrite()
+
+    def _append(self, records: List[Dict]):
+        for record in records:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _rewrite(self):
+        """Reescribir el registro solo con las entradas pendientes."""
+        if self._file:
+            self._file.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            for disk_id, blocks in self._dirty.items():
+                for ref in blocks.values():
+                    f.write(json.dumps({'op': 'dirty', 'disk_id': disk_id, **ref._asdict()}, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'a')
+
+    def mark_dirty(self, disk_id: str, refs: Iterable[DiskBlockRef]):
+        """Registrar (de forma durable) bloques que faltan en un disco."""
+        refs = list(refs)
+        if not refs:
+            return
+        with self._lock:
+            blocks = self._dirty.setdefault(disk_id, {})
+            for ref in refs:
+                blocks[ref.block_id] = ref
+            self._append([{'op': 'dirty', 'disk_id': disk_id, **ref._asdict()} for ref in refs])
+
+    def mark_clean(self, disk_id: str, block_ids: Iterable[str]):
+        """Quitar bloques ya regenerados; compacta el archivo si el disco queda limpio."""
+        with self._lock:
+            blocks = self._dirty.get(disk_id, {})
+            cleaned = [block_id for block_id in block_ids if blocks.pop(block_id, None) is not None]
+            if not blocks:
+                self._dirty.pop(disk_id, None)
+                self._rewrite()
+            elif cleaned:
+                self._append([{'op': 'clean', 'disk_id': disk_id, 'block_id': block_id} for block_id in cleaned])
+
+    def pending(self, disk_id: str) -> List[DiskBlockRef]:
+        """Bloques pendientes de un disco, agrupados por archivo y en orden de franja."""
+        with self._lock:
+            return sorted(self._dirty.get(disk_id, {}).values())
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {disk_id: len(blocks) for disk_id, blocks in self._dirty.items()}
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,52 @@
+"""Despacho concurrente de operaciones de bloque hacia los nodos de disco."""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+
+class DiskDispatcher:
+    """Una cola de trabajo por disco con un límite de operaciones simultáneas.
+
+    Cada disco tiene su propio pool de hilos, así que un disco lento no retrasa
+    a los demás. Las operaciones de un mismo disco se despachan en el orden en
+    que se enviaron (FIFO); con ``max_concurrency=1`` además se ejecutan una
+    detrás de otra. ``depth`` cuenta las operaciones encoladas o en curso de
+    cada disco, para que la colocación de franjas alivie a los discos cargados.
+    """
+
+    def __init__(self, disk_ids: Iterable[str], max_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._depth: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for disk_id in disk_ids:
+            self.add_disk(disk_id)
+
+    def add_disk(self, disk_id: str):
+        """Registrar la cola de trabajo de un disco."""
+        if disk_id not in self._executors:
+            self._executors[disk_id] = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"tecmfs-{disk_id}"
+            )
+
+    def submit(self, disk_id: str, fn: Callable, *args, **kwargs) -> Future:
+        """Encolar una operación en la cola del disco indicado."""
+        with self._lock:
+            self._depth[disk_id] = self._depth.get(disk_id, 0) + 1
+        future = self._executors[disk_id].submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self._done(disk_id))
+        return future
+
+    def _done(self, disk_id: str):
+        with self._lock:
+            self._depth[disk_id] -= 1
+
+    def depth(self, disk_id: str) -> int:
+        """Operaciones encoladas o en curso en un disco."""
+        return self._depth.get(disk_id, 0)
+
+    def shutdown(self, wait: bool = True):
+        """Detener todas las colas de trabajo."""
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
@@ -0,0 +1,84 @@
+"""Codificador de franjas RAID 5 sobre un único buffer contiguo."""
+from typing import List, NamedTuple, Union
+
+from .parity import ParityEngine, np
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+class EncodedStripe(NamedTuple):
+    """Bloques de datos y de paridad de una franja, como vistas sin copia."""
+    index: int  # Índice de la franja dentro del archivo
+    data_blocks: List[memoryview]
+    parity_block: memoryview
+
+
+class StripeEncoder:
+    """Divide un archivo en franjas y calcula toda la paridad de una sola pasada.
+
+    El contenido se ve como un arreglo (franjas x discos de datos x block_size):
+    solo la cola del archivo se copia (una vez) para rellenarla con ceros y los
+    bloques entregados son ``memoryview`` sobre el buffer original, de modo que
+    el uso de memoria queda cerca de 1x el tamaño del archivo más la paridad.
+    """
+
+    def __init__(self, block_size: int, data_disks: int, parity_engine: ParityEngine):
+        self.block_size = block_size
+        self.data_disks = data_disks
+        self.stripe_size = block_size * data_disks
+        self.parity_engine = parity_engine
+
+    def encode(self, content: BufferLike) -> List[EncodedStripe]:
+        """Codificar el contenido completo en franjas de datos y paridad."""
+        view = memoryview(content).cast('B')
+        full_stripes, tail_size = divmod(len(view), self.stripe_size)
+        num_stripes = full_stripes + (1 if tail_size else 0)
+        if num_stripes == 0:
+            return []
+
+        # Rellenar solo la última franja; las franjas completas no se copian
+        tail = bytearray(self.stripe_size)
+        if tail_size:
+            tail[:tail_size] = view[full_stripes * self.stripe_size:]
+        tail_view = memoryview(tail)
+
+        parity = memoryview(self._compute_parity(view, full_stripes, tail_view, num_stripes))
+
+        stripes = []
+        for index in range(num_stripes):
+            if index < full_stripes:
+                stripe_view = view[index * self.stripe_size:(index + 1) * self.stripe_size]
+                blocks_in_stripe = self.data_disks
+            else:
+                stripe_view = tail_view
+                # Como en el diseño original, la última franja solo lleva los bloques que usa
+                blocks_in_stripe = -(-tail_size // self.block_size)
+            data_blocks = [
+                stripe_view[j * self.block_size:(j + 1) * self.block_size]
+                for j in range(blocks_in_stripe)
+            ]
+            parity_block = parity[index * self.block_size:(index + 1) * self.block_size]
+            stripes.append(EncodedStripe(index, data_blocks, parity_block))
+        return stripes
+
+    def _compute_parity(self, view: memoryview, full_stripes: int, tail: memoryview, num_stripes: int):
+        """Calcular los bloques de paridad de todas las franjas en un buffer contiguo."""
+        if np is not None and self.parity_engine.backend == "numpy":
+            dtype = np.uint64 if self.block_size % 8 == 0 else np.uint8
+            words = self.block_size // np.dtype(dtype).itemsize
+            parity = np.empty((num_stripes, words), dtype=dtype)
+            if full_stripes:
+                body = np.frombuffer(view[:full_stripes * self.stripe_size], dtype=dtype)
+                np.bitwise_xor.reduce(body.reshape(full_stripes, self.data_disks, words),
+                                      axis=1, out=parity[:full_stripes])
+            if num_stripes > full_stripes:
+                tail_blocks = np.frombuffer(tail, dtype=dtype).reshape(self.data_disks, words)
+                np.bitwise_xor.reduce(tail_blocks, axis=0, out=parity[full_stripes])
+            return parity.data.cast('B')
+
+        parity = bytearray(num_stripes * self.block_size)
+        for index in range(num_stripes):
+            stripe_view = view[index * self.stripe_size:(index + 1) * self.stripe_size] if index < full_stripes else tail
+            blocks = [stripe_view[j * self.block_size:(j + 1) * self.block_size] for j in range(self.data_disks)]
+            parity[index * self.block_size:(index + 1) * self.block_size] = self.parity_engine.xor_blocks(blocks)
+        return parity
@@ -0,0 +1,160 @@
+"""Caché en disco de archivos ya reconstruidos, con tamaño máximo y desalojo LRU."""
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, Optional
+
+
+class FileCache:
+    """Copias completas de archivos descargados en un directorio local.
+
+    - Cada archivo se escribe primero en ``<file_id>.tmp`` y se publica con
+      ``os.replace`` solo si llegó completo, así nunca se sirve una copia a medias.
+    - Al superar ``max_bytes`` se borran las copias usadas hace más tiempo; el
+      orden se guarda en la fecha de modificación para sobrevivir a reinicios.
+    - Las copias se abren antes de servirlas, así que desalojarlas mientras se
+      envían no corta la descarga.
+    """
+
+    TEMP_SUFFIX = ".tmp"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file_id -> tamaño
+        self._writing: Dict[str, bool] = {}  # file_id -> la copia en curso sigue siendo válida
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if max_bytes > 0:
+            os.makedirs(directory, exist_ok=True)
+            self._scan()
+
+    def _path(self, file_id: str) -> str:
+        return os.path.join(self.directory, file_id)
+
+    def _scan(self):
+        """Recuperar las copias publicadas en una ejecución anterior."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(self.TEMP_SUFFIX):
+                # Copia interrumpida: nunca llegó a publicarse
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, file_id, size in sorted(entries):
+            self._entries[file_id] = size
+            self._size += size
+        self._evict()
+
+    def open(self, file_id: str) -> Optional[BinaryIO]:
+        """Abrir la copia en caché de un archivo, o None si no está."""
+        with self._lock:
+            if file_id not in self._entries:
+                self._misses += 1
+                return None
+            try:
+                cached = open(self._path(file_id), 'rb')
+            except FileNotFoundError:
+                self._size -= self._entries.pop(file_id)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(file_id)
+            self._hits += 1
+        os.utime(cached.fileno())
+        return cached
+
+    def tee(self, file_id: str, size: int, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Entregar ``chunks`` y, de paso, guardar una copia del archivo completo."""
+        with self._lock:
+            cacheable = 0 < size <= self.max_bytes and file_id not in self._writing
+            if cacheable:
+                self._writing[file_id] = True
+        if not cacheable:
+            yield from chunks
+            return
+
+        temp_path = self._path(file_id) + self.TEMP_SUFFIX
+        published = False
+        try:
+            written = 0
+            with open(temp_path, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            if written == size:
+                published = self._publish(file_id, temp_path, size)
+        finally:
+            with self._lock:
+                self._writing.pop(file_id, None)
+            if not published and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _publish(self, file_id: str, temp_path: str, size: int) -> bool:
+        with self._lock:
+            if not self._writing.get(file_id):
+                # El archivo se borró mientras se copiaba
+                return False
+            os.replace(temp_path, self._path(file_id))
+            self._size -= self._entries.pop(file_id, 0)
+            self._entries[file_id] = size
+            self._size += size
+            self._evict()
+            return True
+
+    def _evict(self):
+        """Borrar las copias menos recientes hasta volver al tamaño máximo."""
+        while self._size > self.max_bytes and self._entries:
+            file_id, size = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+            try:
+                os.remove(self._path(file_id))
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, file_id: str):
+        """Descartar la copia de un archivo borrado (y cualquier copia en curso)."""
+        with self._lock:
+            if file_id in self._writing:
+                self._writing[file_id] = False
+            size = self._entries.pop(file_id, None)
+            if size is None:
+                return
+            self._size -= size
+            try:
+                os.remove(self._path(file_id))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos, fallos y desalojos."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_bytes": self.max_bytes,
+                "used_bytes": self._size,
+                "files": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def read_range(cached: BinaryIO, start: int, end: int, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    """Leer [start, end) de una copia en caché por trozos y cerrarla al terminar."""
+    with cached:
+        cached.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = cached.read(min(chunk_size, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
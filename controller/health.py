@@ -0,0 +1,112 @@
+"""Comprobación periódica del estado de los nodos de disco."""
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+import requests
+
+if TYPE_CHECKING:
+    from .raid5 import RAID5Manager
+
+
+class HealthChecker:
+    """Hilo en segundo plano que consulta ``/`` de cada nodo de disco.
+
+    - Un disco ``offline`` vuelve a ``online`` tras ``recover_after`` respuestas
+      seguidas correctas, así un nodo que parpadea no entra y sale sin parar.
+      Si vuelve vacío (p. ej. reiniciado con el almacenamiento borrado) queda
+      como ``failed`` hasta que se reconstruya.
+    - Un disco ``online`` cuyo nodo se reinició entre dos comprobaciones (cambia
+      su ``boot_id``) pasa a ``offline``, para comprobar sus bloques antes de
+      volver a usarlo. Sin ``boot_id``, se vuelve a comprobar contra los
+      metadatos si su espacio usado cae de golpe por debajo de ``data_loss_ratio``.
+    - Un disco ``online`` pasa a ``offline`` tras ``fail_after`` fallos seguidos,
+      aunque nadie le haya pedido un bloque.
+    - Los discos en ``rebuilding`` los gestiona el trabajo de reconstrucción, y
+      los ``failed`` (vacíos o reconstruidos a medias) solo vuelven con otra.
+
+    De paso actualiza el espacio usado y disponible que informa cada nodo, de
+    modo que ``/status`` devuelve el último estado conocido sin hacer peticiones.
+    """
+
+    def __init__(self, manager: "RAID5Manager", interval: float, timeout: float,
+                 recover_after: int, fail_after: int, data_loss_ratio: float):
+        self.manager = manager
+        self.interval = interval
+        self.timeout = timeout
+        self.recover_after = recover_after
+        self.fail_after = fail_after
+        self.data_loss_ratio = data_loss_ratio
+        self._last_used: Dict[str, int] = {}
+        self._boot_ids: Dict[str, str] = {}
+        self._successes: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._last_status: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tecmfs-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for disk_id in list(self.manager.disk_nodes):
+                self.check(disk_id)
+            self._stop.wait(self.interval)
+
+    def check(self, disk_id: str) -> bool:
+        """Consultar un nodo y actualizar su estado. Devuelve si respondió bien."""
+        disk_info = self.manager.disk_nodes.get(disk_id)
+        if disk_info is None or disk_info.pool is None:
+            return False
+        if self._last_status.get(disk_id) != disk_info.status:
+            # El estado cambió (p. ej. una petición falló): las rachas empiezan de cero
+            self._last_status[disk_id] = disk_info.status
+            self._successes[disk_id] = 0
+            self._failures[disk_id] = 0
+        try:
+            response = disk_info.pool.get("/", timeout=self.timeout, retries=0, probe=True)
+            response.raise_for_status()
+            info = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            self._record_failure(disk_id)
+            return False
+        self._record_success(disk_id, info)
+        return True
+
+    def _record_success(self, disk_id: str, info: Dict):
+        self._failures[disk_id] = 0
+        self._successes[disk_id] = self._successes.get(disk_id, 0) + 1
+        disk_info = self.manager.disk_nodes[disk_id]
+        reported_used = None
+        boot_id = info.get("boot_id")
+        previous_boot_id = self._boot_ids.get(disk_id)
+        if boot_id:
+            self._boot_ids[disk_id] = boot_id
+        if disk_info.status == "online" and previous_boot_id and boot_id and boot_id != previous_boot_id:
+            print(f"Disco {disk_id} se reinició; se comprueban sus bloques antes de volver a usarlo.")
+            disk_info.status = "offline"
+        if "capacity_bytes" in info:
+            disk_info.total_space = info["capacity_bytes"]
+            disk_info.used_space = reported_used = info.get("used_space_bytes", 0)
+            disk_info.available_space = info.get("available_space_bytes", disk_info.total_space - disk_info.used_space)
+            previous_used = self._last_used.get(disk_id)
+            self._last_used[disk_id] = reported_used
+            if (disk_info.status == "online" and previous_used
+                    and reported_used < previous_used * self.data_loss_ratio):
+                self.manager.verify_disk_data(disk_id, reported_used)
+        if disk_info.status == "offline" and self._successes[disk_id] >= self.recover_after:
+            if self.manager.mark_disk_online(disk_id, reported_used):
+                print(f"Disco {disk_id} responde de nuevo; vuelve a estar en línea.")
+
+    def _record_failure(self, disk_id: str):
+        self._successes[disk_id] = 0
+        self._failures[disk_id] = self._failures.get(disk_id, 0) + 1
+        disk_info = self.manager.disk_nodes[disk_id]
+        if disk_info.status == "online" and self._failures[disk_id] >= self.fail_after:
+            print(f"Disco {disk_id} no responde; se marca como fuera de línea.")
+            disk_info.status = "offline"
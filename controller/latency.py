@@ -0,0 +1,80 @@
+"""Latencias recientes de lectura por disco, para decidir cuándo hacer lecturas cubiertas."""
+import statistics
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Guarda las últimas ``window`` latencias de cada disco y calcula percentiles.
+
+    El umbral de cobertura (``hedge_delay``) es la mediana entre discos de su
+    percentil ``percentile``: un solo disco lento no lo arrastra, así que sus
+    bloques se cubren con la paridad en lugar de esperarlos.
+    """
+
+    def __init__(self, window: int = 256, percentile: float = 95, min_samples: int = 20,
+                 min_delay: float = 0.0):
+        self.window = window
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._hedges = 0
+        self._hedges_won = 0
+
+    def record(self, disk_id: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(disk_id)
+            if samples is None:
+                samples = self._samples[disk_id] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def record_hedge(self, won: bool):
+        """Contar una lectura cubierta y si la reconstrucción llegó antes."""
+        with self._lock:
+            self._hedges += 1
+            if won:
+                self._hedges_won += 1
+
+    def percentile_of(self, disk_id: str, percentile: float) -> Optional[float]:
+        """Percentil de las latencias recientes de un disco, o None sin muestras suficientes."""
+        with self._lock:
+            samples = sorted(self._samples.get(disk_id, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes de cubrir un bloque con la paridad, o None si aún no hay datos."""
+        with self._lock:
+            disk_ids = list(self._samples)
+        per_disk = [self.percentile_of(disk_id, self.percentile) for disk_id in disk_ids]
+        per_disk = [value for value in per_disk if value is not None]
+        if not per_disk:
+            return None
+        return max(self.min_delay, statistics.median(per_disk))
+
+    def stats(self) -> Dict:
+        """Percentiles por disco y contadores de lecturas cubiertas."""
+        with self._lock:
+            disk_ids = list(self._samples)
+            hedges, hedges_won = self._hedges, self._hedges_won
+        disks = {}
+        for disk_id in disk_ids:
+            disks[disk_id] = {
+                "p50_ms": _to_ms(self.percentile_of(disk_id, 50)),
+                "p95_ms": _to_ms(self.percentile_of(disk_id, 95)),
+                "p99_ms": _to_ms(self.percentile_of(disk_id, 99)),
+            }
+        return {
+            "disks": disks,
+            "hedge_delay_ms": _to_ms(self.hedge_delay()),
+            "hedges": hedges,
+            "hedges_won": hedges_won,
+        }
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
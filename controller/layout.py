@@ -0,0 +1,120 @@
+"""Ubicación aritmética de bloques RAID 5 a partir del descriptor de franjas.
+
+Con rotación de paridad la ubicación de cada bloque queda determinada por el
+número global de la franja, así que no hace falta guardar un mapa por bloque:
+basta con la primera franja, el número de franjas, el tamaño de bloque y el
+número de discos de datos (ver ``StripeLayout`` en ``schemas.py``). Solo las
+franjas que la colocación sacó de la rotación se guardan en ``disk_map``.
+
+Si la franja es más estrecha que el arreglo (``data_disks + 1 < len(disks)``)
+las franjas consecutivas ocupan discos consecutivos, de modo que se reparten
+por todo el arreglo (disposición declustered).
+"""
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Versión de la disposición: 1 = paridad rotativa en discos disk_1..disk_N,
+# 2 = rotación con excepciones por franja (``disk_map``),
+# 3 = arreglo de discos guardado en el layout y franjas de ancho configurable
+LAYOUT_VERSION = 3
+
+# (block_id, disk_id)
+BlockLocation = Tuple[str, str]
+
+
+def make_block_id(file_id: str, block_index: str) -> str:
+    """Generar ID único para un bloque"""
+    return f"{file_id}_block_{block_index}"
+
+
+def disk_id_for(disk_index: int) -> str:
+    return f"disk_{disk_index + 1}"
+
+
+def rotation_disk_indices(stripe_number: int, num_disks: int, width: Optional[int] = None) -> List[int]:
+    """Discos de una franja según la rotación: [datos..., paridad]
+
+    La franja ``n`` empieza en el disco ``n * width`` (módulo ``num_disks``). Cada
+    ``num_disks / mcd(num_disks, width)`` franjas se recubre el arreglo entero y
+    la paridad pasa a la siguiente posición de la franja, así cada disco guarda
+    la misma cantidad de paridad. Con ``width == num_disks`` es la rotación
+    RAID 5 de siempre: paridad en el disco ``n % num_disks``.
+    """
+    width = width or num_disks
+    cycle = num_disks // math.gcd(num_disks, width)
+    disks = [(stripe_number * width + k) % num_disks for k in range(width)]
+    parity = disks.pop((stripe_number // cycle) % width)
+    return disks + [parity]
+
+
+def blocks_in_stripe(stripe_index: int, size: int, block_size: int, data_disks: int) -> int:
+    """Bloques de datos de una franja; la última solo lleva los que usa"""
+    remaining = size - stripe_index * block_size * data_disks
+    return max(0, min(data_disks, -(-remaining // block_size)))
+
+
+def iter_stripe_locations(file_id: str, size: int, first_stripe: int, stripe_count: int,
+                          block_size: int, data_disks: int,
+                          disk_map: Optional[Dict[int, List[int]]] = None,
+                          disk_ids: Optional[List[str]] = None
+                          ) -> Iterator[Tuple[int, List[BlockLocation], BlockLocation]]:
+    """Recorrer las franjas de un archivo: (índice, bloques de datos, bloque de paridad)
+
+    ``disk_map`` da los discos ``[datos..., paridad]`` de las franjas que no
+    siguen la rotación, como índices en ``disk_ids`` (el arreglo con el que se
+    escribió el archivo; sin él, ``disk_1..disk_N`` con una franja por disco).
+    """
+    width = data_disks + 1
+    if not disk_ids:
+        disk_ids = [disk_id_for(j) for j in range(width)]
+    for stripe_index in range(stripe_count):
+        stripe_disks = (disk_map or {}).get(stripe_index)
+        if stripe_disks is None:
+            stripe_disks = rotation_disk_indices(first_stripe + stripe_index, len(disk_ids), width)
+        data_blocks = [
+            (make_block_id(file_id, f"{stripe_index}_{j}"), disk_ids[stripe_disks[j]])
+            for j in range(blocks_in_stripe(stripe_index, size, block_size, data_disks))
+        ]
+        parity = (make_block_id(file_id, f"parity_{stripe_index}"), disk_ids[stripe_disks[-1]])
+        yield stripe_index, data_blocks, parity
+
+
+def disk_block_counts(size: int, first_stripe: int, stripe_count: int, block_size: int, data_disks: int,
+                      disk_map: Optional[Dict[int, List[int]]] = None,
+                      disk_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """Bloques (datos y paridad) que un archivo guarda en cada disco, sin recorrer sus franjas.
+
+    Una franja completa de la rotación pone un bloque en cada uno de sus
+    discos, y esos discos se repiten cada ``num_disks / mcd(num_disks, width)``
+    franjas: basta contar cuántas franjas caen en cada posición del ciclo. La
+    última franja (puede ir incompleta) y las de ``disk_map`` se cuentan aparte.
+    """
+    width = data_disks + 1
+    if not disk_ids:
+        disk_ids = [disk_id_for(j) for j in range(width)]
+    num_disks = len(disk_ids)
+    cycle = num_disks // math.gcd(num_disks, width)
+    disk_map = disk_map or {}
+    special = {stripe_index for stripe_index in disk_map if 0 <= stripe_index < stripe_count}
+    if stripe_count:
+        special.add(stripe_count - 1)
+
+    # Franjas completas de la rotación según su posición en el ciclo
+    full_cycles, rest = divmod(stripe_count, cycle)
+    per_offset = [full_cycles + (1 if (offset - first_stripe) % cycle < rest else 0) for offset in range(cycle)]
+    for stripe_index in special:
+        per_offset[(first_stripe + stripe_index) % cycle] -= 1
+
+    counts = [0] * num_disks
+    for offset, stripes in enumerate(per_offset):
+        if stripes:
+            for k in range(width):
+                counts[(offset * width + k) % num_disks] += stripes
+    for stripe_index in special:
+        stripe_disks = disk_map.get(stripe_index)
+        if stripe_disks is None:
+            stripe_disks = rotation_disk_indices(first_stripe + stripe_index, num_disks, width)
+        data_blocks = blocks_in_stripe(stripe_index, size, block_size, data_disks)
+        for disk_index in stripe_disks[:data_blocks] + stripe_disks[-1:]:
+            counts[disk_index] += 1
+    return {disk_ids[j]: count for j, count in enumerate(counts) if count}
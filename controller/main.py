@@ -1,19 +1,56 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header
+from fastapi.responses import StreamingResponse
 import uvicorn
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 import os
 import json
-from datetime import datetime
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
 from .raid5 import RAID5Manager
-from .schemas import FileMetadata, SystemStatus, FileUploadResponse, FileBlockStatus
+from .file_cache import read_range
+from .schemas import (
+    FileMetadata, SystemStatus, FileUploadResponse, FileBlockStatus, ConnectionPoolStats, CacheStats,
+    RebuildRequest, RebuildProgress, DiskUsage, LatencyStats
+)
+from .config.settings import CONTROLLER_IO_WORKERS
 
 app = FastAPI(title="TECMFS Controller", version="1.0.0")
 
 # Inicializar el gestor RAID 5
 raid_manager = RAID5Manager()
 
+# Pool de hilos para la E/S bloqueante del RAID (HTTP a los discos, metadatos),
+# así el event loop sigue atendiendo otras peticiones mientras tanto
+io_executor = ThreadPoolExecutor(max_workers=CONTROLLER_IO_WORKERS, thread_name_prefix="tecmfs-io")
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    """Ejecutar una operación bloqueante en el pool de E/S sin frenar el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, functools.partial(fn, *args, **kwargs))
+
+async def iterate_blocking(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Recorrer un generador bloqueante desde el pool de E/S"""
+    sentinel = object()
+    while True:
+        chunk = await run_blocking(next, iterator, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+@app.on_event("startup")
+async def startup_event():
+    """Arrancar la comprobación de salud de los discos en segundo plano"""
+    raid_manager.start_health_checks()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Liberar hilos y conexiones al detener el controlador"""
+    io_executor.shutdown(wait=False)
+    raid_manager.close()
+
 @app.get("/")
 async def root():
     """Endpoint raíz para verificar que el servidor está funcionando"""
@@ -32,30 +69,78 @@ async def get_system_status():
 async def get_block_status():
     """Obtener el estado detallado de todos los bloques de todos los archivos."""
     try:
-        block_details = raid_manager.get_all_blocks_status()
+        block_details = await run_blocking(raid_manager.get_all_blocks_status)
         return block_details
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo estado de los bloques: {str(e)}")
 
+@app.get("/status/disks", response_model=Dict[str, DiskUsage])
+async def get_disk_usage():
+    """Obtener los bloques y bytes que ocupa cada disco."""
+    try:
+        return await run_blocking(raid_manager.get_disk_usage)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo la ocupación de los discos: {str(e)}")
+
+@app.get("/status/latency", response_model=LatencyStats)
+async def get_latency_status():
+    """Obtener las latencias de lectura por disco y las lecturas cubiertas con paridad."""
+    try:
+        return raid_manager.get_latency_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo las latencias: {str(e)}")
+
+@app.get("/status/pools", response_model=Dict[str, ConnectionPoolStats])
+async def get_pool_status():
+    """Obtener las estadísticas de los pools de conexiones hacia cada disco."""
+    try:
+        return raid_manager.get_pool_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo estado de los pools: {str(e)}")
+
+@app.get("/status/cache", response_model=CacheStats)
+async def get_cache_status():
+    """Obtener los aciertos, fallos y descartes de las cachés de bloques y de archivos."""
+    try:
+        return raid_manager.get_cache_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo estado de la caché: {str(e)}")
+
+@app.post("/rebuild", response_model=RebuildProgress)
+async def start_rebuild(request: RebuildRequest):
+    """Reconstruir un disco caído sobre un nodo de reemplazo, en segundo plano"""
+    try:
+        return raid_manager.start_rebuild(request.disk_id, request.url, request.force)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/rebuild/progress", response_model=RebuildProgress)
+async def get_rebuild_progress():
+    """Obtener el progreso de la reconstrucción: bloques por segundo y tiempo restante"""
+    progress = raid_manager.get_rebuild_progress()
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No se ha lanzado ninguna reconstrucción")
+    return progress
+
 @app.post("/upload", response_model=FileUploadResponse)
 async def upload_file(file: UploadFile = File(...)):
     """Subir un archivo al sistema RAID 5"""
     try:
-        # Leer el contenido del archivo
-        content = await file.read()
-        
         # Verificar que el archivo tenga nombre
         if not file.filename:
             raise HTTPException(status_code=400, detail="El archivo debe tener un nombre")
         
-        # Guardar el archivo usando RAID 5
-        file_id = raid_manager.store_file(file.filename, content)
+        # Guardar el archivo usando RAID 5, leyéndolo por franjas sin cargarlo entero
+        file_id = await run_blocking(raid_manager.store_stream, file.filename, file.file)
+        metadata = await run_blocking(raid_manager.get_file, file_id)
         
         return FileUploadResponse(
             file_id=file_id,
             filename=file.filename,
-            size=len(content),
-            uploaded_at=datetime.now().isoformat(),
+            size=metadata.size,
+            uploaded_at=metadata.uploaded_at,
             message="Archivo subido exitosamente"
         )
     except Exception as e:
@@ -65,29 +150,87 @@ async def upload_file(file: UploadFile = File(...)):
 async def list_files():
     """Listar todos los archivos almacenados"""
     try:
-        files = raid_manager.list_files()
+        files = await run_blocking(raid_manager.list_files)
         return files
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listando archivos: {str(e)}")
 
+def content_disposition(filename: str) -> str:
+    """Cabecera Content-Disposition para descargar con el nombre original"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Interpretar una cabecera Range de un solo rango como [inicio, fin) en bytes.
+
+    Devuelve None si no hay rango utilizable (se envía el archivo completo) y
+    lanza 416 si el rango está fuera del archivo.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+            if last and end <= start:
+                # "bytes=500-100" no es un rango válido: se ignora y se envía todo
+                return None
+        elif last:
+            # Sufijo: los últimos N bytes
+            start = max(0, size - int(last))
+            end = size
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail="Rango no satisfacible",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size)
+
 @app.get("/download/{file_id}")
-async def download_file(file_id: str):
-    """Descargar un archivo por su ID"""
+async def download_file(file_id: str, range: Optional[str] = Header(None)):
+    """Descargar un archivo (o un rango de bytes) por su ID"""
     try:
-        file_data = raid_manager.retrieve_file(file_id)
-        if not file_data:
+        metadata = await run_blocking(raid_manager.get_file, file_id)
+        if not metadata:
             raise HTTPException(status_code=404, detail="Archivo no encontrado")
         
-        # Crear un archivo temporal para la descarga
-        temp_path = f"temp_{file_id}"
-        with open(temp_path, "wb") as f:
-            f.write(file_data['content'])
-        
-        return FileResponse(
-            path=temp_path,
-            filename=file_data['filename'],
-            media_type='application/octet-stream'
+        headers = {
+            "Content-Disposition": content_disposition(metadata.filename),
+            "Accept-Ranges": "bytes",
+        }
+        byte_range = parse_range(range, metadata.size)
+        start, end = byte_range if byte_range else (0, metadata.size)
+        cached = await run_blocking(raid_manager.open_cached_file, file_id)
+        if cached is not None:
+            # Copia local ya reconstruida: no hace falta leer los discos
+            chunks = read_range(cached, start, end)
+        elif byte_range is None:
+            # Enviar las franjas a medida que se recuperan, guardando una copia local
+            chunks = raid_manager.iter_file(metadata)
+        else:
+            # Contenido parcial: solo se leen los bloques que cubren el rango
+            chunks = raid_manager.iter_file_stripes(metadata, start, end)
+
+        headers["Content-Length"] = str(end - start)
+        if byte_range is None:
+            return StreamingResponse(iterate_blocking(chunks), media_type='application/octet-stream', headers=headers)
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{metadata.size}"
+        return StreamingResponse(
+            iterate_blocking(chunks),
+            status_code=206,
+            media_type='application/octet-stream',
+            headers=headers
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error descargando archivo: {str(e)}")
 
@@ -95,7 +238,7 @@ async def download_file(file_id: str):
 async def delete_file(file_id: str):
     """Eliminar un archivo del sistema"""
     try:
-        success = raid_manager.delete_file(file_id)
+        success = await run_blocking(raid_manager.delete_file, file_id)
         if not success:
             raise HTTPException(status_code=404, detail="Archivo no encontrado")
         
@@ -107,7 +250,7 @@ async def delete_file(file_id: str):
 async def search_files(query: str):
     """Buscar archivos por nombre"""
     try:
-        results = raid_manager.search_files(query)
+        results = await run_blocking(raid_manager.search_files, query)
         return {"query": query, "results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error buscando archivos: {str(e)}")
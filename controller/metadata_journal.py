@@ -0,0 +1,168 @@
+"""Journal de metadatos de solo anexado con instantáneas compactadas."""
+import json
+import os
+import threading
+from typing import Dict, List, Tuple
+
+
+class MetadataJournal:
+    """Persiste cada cambio de metadatos como un registro JSON de una línea.
+
+    - Cada mutación añade un registro compacto al journal en vez de reescribir
+      todo ``metadata.json``, así que el costo de una subida no crece con el
+      número de archivos.
+    - Las escrituras concurrentes comparten un mismo ``fsync`` (group commit):
+      el primer hilo que espera hace el fsync por todos los pendientes.
+    - Cada ``compact_every`` registros se escribe una instantánea atómica
+      (archivo temporal + rename) con el mismo formato que ``metadata.json`` y
+      el journal se reinicia, lo que acota el tiempo de recuperación.
+
+    Recuperación: instantánea + journal rotado (si quedó de una compactación
+    interrumpida) + journal actual, en ese orden. Reaplicar registros ya
+    incluidos en la instantánea es inofensivo porque cada registro guarda el
+    estado completo del archivo.
+    """
+
+    def __init__(self, snapshot_path: str, journal_path: str, compact_every: int = 10000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.rotated_path = journal_path + ".old"
+        self.compact_every = compact_every
+        self._cond = threading.Condition()
+        self._file = None
+        self._written = 0  # Registros escritos en el buffer
+        self._durable = 0  # Registros ya sincronizados con fsync
+        self._syncing = False
+        self._records_since_snapshot = 0
+        self._compacting = False
+
+    def load(self) -> Tuple[Dict[str, Dict], int]:
+        """Reconstruir el estado: devuelve ({file_id: metadatos}, next_stripe_number)."""
+        files: Dict[str, Dict] = {}
+        next_stripe_number = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            files = data.get('files', {})
+            next_stripe_number = data.get('next_stripe_number', 0)
+
+        for path in (self.rotated_path, self.journal_path):
+            for record in self._read_records(path):
+                if record.get('op') == 'put':
+                    files[record['file']['file_id']] = record['file']
+                elif record.get('op') == 'delete':
+                    files.pop(record['file_id'], None)
+                next_stripe_number = max(next_stripe_number, record.get('next_stripe_number', 0))
+                self._records_since_snapshot += 1
+
+        if os.path.exists(self.rotated_path):
+            # Una compactación quedó a medias: completarla antes de aceptar escrituras
+            self._write_snapshot(files, next_stripe_number)
+            os.remove(self.rotated_path)
+            open(self.journal_path, 'w').close()
+            self._records_since_snapshot = 0
+
+        self._open()
+        return files, next_stripe_number
+
+    def _read_records(self, path: str) -> List[Dict]:
+        """Leer los registros de un journal, ignorando una última línea incompleta."""
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Advertencia: registro corrupto en {path}:{line_number}, se ignora el resto.")
+                    break
+        return records
+
+    def _open(self):
+        self._file = open(self.journal_path, 'a')
+
+    def write(self, record: Dict) -> int:
+        """Añadir un registro al journal (sin esperar el fsync). Devuelve su número de secuencia."""
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._cond:
+            self._file.write(line)
+            self._written += 1
+            self._records_since_snapshot += 1
+            return self._written
+
+    def sync(self, sequence: int):
+        """Esperar a que el registro ``sequence`` sea durable, agrupando fsyncs concurrentes."""
+        with self._cond:
+            while self._durable < sequence:
+                if self._syncing:
+                    # Otro hilo ya está haciendo el fsync; puede cubrir este registro
+                    self._cond.wait()
+                    continue
+                self._syncing = True
+                target = self._written
+                journal = self._file
+                journal.flush()
+                self._cond.release()
+                try:
+                    os.fsync(journal.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._cond.notify_all()
+                self._durable = max(self._durable, target)
+
+    def append(self, record: Dict):
+        """Añadir un registro y esperar a que sea durable."""
+        self.sync(self.write(record))
+
+    def needs_compaction(self) -> bool:
+        return not self._compacting and self._records_since_snapshot >= self.compact_every
+
+    def begin_compaction(self) -> bool:
+        """Rotar el journal actual para compactarlo. Llamar con los metadatos bloqueados.
+
+        Devuelve False si ya hay una compactación en curso.
+        """
+        with self._cond:
+            if self._compacting:
+                return False
+            while self._syncing:
+                self._cond.wait()
+            self._compacting = True
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self.journal_path, self.rotated_path)
+            self._open()
+            self._durable = self._written
+            self._records_since_snapshot = 0
+            return True
+
+    def finish_compaction(self, files: Dict[str, Dict], next_stripe_number: int):
+        """Escribir la instantánea de forma atómica y descartar el journal rotado."""
+        try:
+            self._write_snapshot(files, next_stripe_number)
+            os.remove(self.rotated_path)
+        finally:
+            with self._cond:
+                self._compacting = False
+
+    def _write_snapshot(self, files: Dict[str, Dict], next_stripe_number: int):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'files': files, 'next_stripe_number': next_stripe_number}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+    def close(self):
+        with self._cond:
+            if self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
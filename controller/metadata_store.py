@@ -0,0 +1,383 @@
+"""Backends de almacenamiento de metadatos del controlador."""
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from .schemas import FileMetadata, StripeLayout
+from .stripe_index import DiskBlockRef
+from .metadata_journal import MetadataJournal
+from .config.settings import BLOCK_SIZE
+
+
+def stored_block_size(metadata: FileMetadata) -> int:
+    """Tamaño de bloque de un archivo; los archivos antiguos usan el de la configuración."""
+    return metadata.layout.block_size if metadata.layout else BLOCK_SIZE
+
+
+def file_blocks_on_disk(metadata: FileMetadata, disk_id: str) -> Iterator[DiskBlockRef]:
+    """Bloques de un archivo en un disco, en orden de franja.
+
+    Las franjas se calculan sobre la marcha a partir del layout, sin dejar un
+    índice de franjas en los metadatos guardados.
+    """
+    stripes = metadata.iter_stripes() if metadata.layout else metadata.build_stripe_index()
+    for stripe_index, data_blocks, parity in stripes:
+        for block_id, block_disk_id in data_blocks + ([parity] if parity else []):
+            if block_disk_id == disk_id:
+                yield DiskBlockRef(metadata.file_id, stripe_index, block_id)
+
+
+def file_blocks_status(metadata: FileMetadata) -> Dict:
+    """Estado de los bloques de un archivo: por franja, los de datos y luego la paridad."""
+    blocks = []
+    for entry in metadata.build_stripe_index():
+        for block_id, disk_id in entry.data_blocks:
+            blocks.append({"block_id": block_id, "disk_id": disk_id, "type": "data"})
+        if entry.parity:
+            block_id, disk_id = entry.parity
+            blocks.append({"block_id": block_id, "disk_id": disk_id, "type": "parity"})
+    return {"file_id": metadata.file_id, "filename": metadata.filename, "blocks": blocks}
+
+
+class JournalMetadataStore:
+    """Metadatos en un diccionario en memoria, persistidos con ``MetadataJournal``."""
+
+    def __init__(self, snapshot_path: str, journal_path: str, compact_every: int = 10000):
+        self.journal = MetadataJournal(snapshot_path, journal_path, compact_every)
+        self.files: Dict[str, FileMetadata] = {}
+        # Índice inverso: disk_id -> {file_id: bloques del archivo en ese disco}
+        self.disk_index: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def load(self) -> int:
+        """Cargar los metadatos; devuelve el contador global de franjas."""
+        loaded_files, next_stripe_number = self.journal.load()
+        self.files = {
+            file_id: FileMetadata(**metadata)
+            for file_id, metadata in loaded_files.items()
+        }
+        # El índice inverso se guarda con cada archivo (``disk_blocks``); los
+        # registros anteriores lo calculan a partir del layout
+        self.disk_index = {}
+        for metadata in self.files.values():
+            self._index_file(metadata)
+        return next_stripe_number
+
+    def _index_file(self, metadata: FileMetadata):
+        for disk_id, count in metadata.disk_block_counts().items():
+            self.disk_index.setdefault(disk_id, {})[metadata.file_id] = count
+
+    def _unindex_file(self, file_id: str):
+        for files in self.disk_index.values():
+            files.pop(file_id, None)
+
+    def get(self, file_id: str) -> Optional[FileMetadata]:
+        return self.files.get(file_id)
+
+    def put(self, metadata: FileMetadata, next_stripe_number: int):
+        """Registrar un archivo en memoria y en el journal."""
+        with self._lock:
+            self._unindex_file(metadata.file_id)
+            self.files[metadata.file_id] = metadata
+            self._index_file(metadata)
+            sequence = self.journal.write({
+                'op': 'put',
+                'file': metadata.model_dump(),
+                'next_stripe_number': next_stripe_number
+            })
+        self._commit(sequence, next_stripe_number)
+
+    def delete(self, file_id: str, next_stripe_number: int):
+        """Eliminar un archivo de la memoria y registrarlo en el journal."""
+        with self._lock:
+            self.files.pop(file_id, None)
+            self._unindex_file(file_id)
+            sequence = self.journal.write({'op': 'delete', 'file_id': file_id})
+        self._commit(sequence, next_stripe_number)
+
+    def _commit(self, sequence: int, next_stripe_number: int):
+        """Esperar el fsync (compartido con otras escrituras) y compactar si toca."""
+        self.journal.sync(sequence)
+        if self.journal.needs_compaction():
+            threading.Thread(target=self._compact, args=(next_stripe_number,), daemon=True).start()
+
+    def _compact(self, next_stripe_number: int):
+        """Escribir una instantánea de los metadatos y reiniciar el journal."""
+        try:
+            with self._lock:
+                if not self.journal.begin_compaction():
+                    return
+                files = dict(self.files)
+            # Serializar fuera del lock para no frenar subidas y borrados
+            self.journal.finish_compaction(
+                {file_id: metadata.model_dump() for file_id, metadata in files.items()},
+                next_stripe_number
+            )
+        except Exception as e:
+            print(f"Error compactando metadatos: {e}")
+
+    def list_files(self) -> List[FileMetadata]:
+        with self._lock:
+            return list(self.files.values())
+
+    def search(self, query: str) -> List[FileMetadata]:
+        query_lower = query.lower()
+        return [metadata for metadata in self.list_files() if query_lower in metadata.filename.lower()]
+
+    def blocks_on_disk(self, disk_id: str) -> Iterator[DiskBlockRef]:
+        """Bloques guardados en un disco, agrupados por archivo y en orden de franja."""
+        with self._lock:
+            files = [self.files[file_id] for file_id in self.disk_index.get(disk_id, {})]
+        # Solo se recorren los archivos con bloques en el disco
+        for metadata in files:
+            yield from file_blocks_on_disk(metadata, disk_id)
+
+    def disk_usage(self) -> Dict[str, Dict[str, int]]:
+        """Bloques y bytes que ocupa cada disco, según el índice inverso."""
+        usage = {}
+        with self._lock:
+            for disk_id, files in self.disk_index.items():
+                blocks = 0
+                used_bytes = 0
+                for file_id, count in files.items():
+                    blocks += count
+                    used_bytes += count * stored_block_size(self.files[file_id])
+                usage[disk_id] = {"blocks": blocks, "bytes": used_bytes}
+        return usage
+
+    def blocks_status(self) -> List[Dict]:
+        """Estado de todos los bloques de todos los archivos, ordenado por nombre."""
+        status_list = [file_blocks_status(metadata) for metadata in self.list_files()]
+        return sorted(status_list, key=lambda x: x['filename'])
+
+    def close(self):
+        self.journal.close()
+
+
+class SQLiteMetadataStore:
+    """Metadatos en SQLite (modo WAL) con índices, sin cargarlos todos en memoria.
+
+    Tablas: ``files`` (un registro por archivo, con su layout) y ``file_disks``
+    (índice inverso: bloques de cada archivo en cada disco). Las ubicaciones de
+    los archivos con layout se calculan; solo los archivos antiguos, sin layout,
+    guardan ``stripes`` (franjas con su disco de paridad) y ``blocks``
+    (ubicación de cada bloque). Índices sobre ``filename``, ``uploaded_at`` y
+    ``disk_id``.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            filename_lower TEXT,  -- filename con str.lower() de Python, para las búsquedas
+            size INTEGER NOT NULL,
+            uploaded_at TEXT NOT NULL,
+            layout TEXT  -- Descriptor StripeLayout en JSON; NULL en archivos antiguos
+        );
+        CREATE TABLE IF NOT EXISTS stripes (
+            file_id TEXT NOT NULL,
+            stripe_index INTEGER NOT NULL,
+            parity_disk_id TEXT NOT NULL,
+            PRIMARY KEY (file_id, stripe_index)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS blocks (
+            block_id TEXT PRIMARY KEY,
+            file_id TEXT NOT NULL,
+            stripe_index INTEGER NOT NULL,
+            block_index INTEGER NOT NULL,  -- -1 para el bloque de paridad
+            disk_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS file_disks (
+            disk_id TEXT NOT NULL,
+            file_id TEXT NOT NULL,
+            blocks INTEGER NOT NULL,  -- Bloques (datos y paridad) del archivo en el disco
+            PRIMARY KEY (disk_id, file_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_filename ON files(filename);
+        CREATE INDEX IF NOT EXISTS idx_files_uploaded_at ON files(uploaded_at);
+        CREATE INDEX IF NOT EXISTS idx_blocks_disk ON blocks(disk_id);
+        CREATE INDEX IF NOT EXISTS idx_blocks_file ON blocks(file_id, stripe_index, block_index);
+        CREATE INDEX IF NOT EXISTS idx_file_disks_file ON file_disks(file_id);
+    """
+
+    def __init__(self, db_path: str, legacy_snapshot_path: Optional[str] = None,
+                 legacy_journal_path: Optional[str] = None):
+        self.db_path = db_path
+        self.legacy_snapshot_path = legacy_snapshot_path
+        self.legacy_journal_path = legacy_journal_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Una conexión por hilo; WAL permite lecturas concurrentes con una escritura."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def load(self) -> int:
+        """Crear el esquema e importar metadatos JSON previos la primera vez."""
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+        if 'layout' not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN layout TEXT")
+        if 'filename_lower' not in columns:
+            with conn:
+                conn.execute("ALTER TABLE files ADD COLUMN filename_lower TEXT")
+                conn.executemany("UPDATE files SET filename_lower = ? WHERE file_id = ?", [
+                    (filename.lower(), file_id)
+                    for file_id, filename in conn.execute("SELECT file_id, filename FROM files").fetchall()
+                ])
+        has_files = conn.execute("SELECT EXISTS (SELECT 1 FROM files)").fetchone()[0]
+        if has_files and not conn.execute("SELECT EXISTS (SELECT 1 FROM file_disks)").fetchone()[0]:
+            self._migrate_disk_index(conn)
+        is_empty = conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 0
+        legacy_paths = [path for path in (self.legacy_snapshot_path, self.legacy_journal_path) if path]
+        if is_empty and legacy_paths and any(os.path.exists(path) for path in legacy_paths):
+            legacy = JournalMetadataStore(self.legacy_snapshot_path, self.legacy_journal_path)
+            next_stripe_number = legacy.load()
+            legacy.close()
+            for metadata in legacy.list_files():
+                self.put(metadata, next_stripe_number)
+            print(f"Importados {len(legacy.files)} archivos desde los metadatos JSON")
+        row = conn.execute("SELECT value FROM counters WHERE name = 'next_stripe_number'").fetchone()
+        return row[0] if row else 0
+
+    def _migrate_disk_index(self, conn: sqlite3.Connection):
+        """Crear ``file_disks`` en una base anterior y quitar las filas por bloque
+        de los archivos con layout, que ya no se guardan."""
+        files = self.list_files()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO file_disks VALUES (?, ?, ?)", [
+                (disk_id, metadata.file_id, count)
+                for metadata in files for disk_id, count in metadata.disk_block_counts().items()
+            ])
+            conn.execute("DELETE FROM blocks WHERE file_id IN (SELECT file_id FROM files WHERE layout IS NOT NULL)")
+            conn.execute("DELETE FROM stripes WHERE file_id IN (SELECT file_id FROM files WHERE layout IS NOT NULL)")
+        print(f"Índice por disco creado para {len(files)} archivos")
+
+    def put(self, metadata: FileMetadata, next_stripe_number: int):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files (file_id, filename, filename_lower, size, uploaded_at, layout) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (metadata.file_id, metadata.filename, metadata.filename.lower(), metadata.size, metadata.uploaded_at,
+                 metadata.layout.model_dump_json() if metadata.layout else None)
+            )
+            self._delete_locations(conn, metadata.file_id)
+            conn.executemany("INSERT INTO file_disks VALUES (?, ?, ?)", [
+                (disk_id, metadata.file_id, count) for disk_id, count in metadata.disk_block_counts().items()
+            ])
+            if metadata.layout is None:
+                # Solo los archivos antiguos guardan la ubicación de cada bloque
+                block_rows = []
+                stripe_rows = []
+                for entry in metadata.build_stripe_index():
+                    for block_index, (block_id, disk_id) in enumerate(entry.data_blocks):
+                        block_rows.append((block_id, metadata.file_id, entry.index, block_index, disk_id))
+                    if entry.parity:
+                        block_id, disk_id = entry.parity
+                        block_rows.append((block_id, metadata.file_id, entry.index, -1, disk_id))
+                        stripe_rows.append((metadata.file_id, entry.index, disk_id))
+                conn.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?)", block_rows)
+                conn.executemany("INSERT OR REPLACE INTO stripes VALUES (?, ?, ?)", stripe_rows)
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('next_stripe_number', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+                (next_stripe_number,)
+            )
+
+    def delete(self, file_id: str, next_stripe_number: int):
+        conn = self._connection()
+        with conn:
+            self._delete_locations(conn, file_id)
+            conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def _delete_locations(self, conn: sqlite3.Connection, file_id: str):
+        conn.execute("DELETE FROM file_disks WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM stripes WHERE file_id = ?", (file_id,))
+
+    def _build_metadata(self, row) -> FileMetadata:
+        file_id, filename, size, uploaded_at, layout = row
+        if layout is not None:
+            # Las ubicaciones se calculan a partir del layout; no hace falta leer los bloques
+            return FileMetadata(
+                file_id=file_id, filename=filename, size=size, uploaded_at=uploaded_at,
+                layout=StripeLayout.model_validate_json(layout)
+            )
+        blocks = {}
+        parity_blocks = {}
+        for block_id, block_index, disk_id in self._connection().execute(
+            "SELECT block_id, block_index, disk_id FROM blocks WHERE file_id = ? "
+            "ORDER BY stripe_index, block_index", (file_id,)
+        ):
+            if block_index < 0:
+                parity_blocks[block_id] = disk_id
+            else:
+                blocks[block_id] = disk_id
+        return FileMetadata(
+            file_id=file_id, filename=filename, size=size, uploaded_at=uploaded_at,
+            blocks=blocks, parity_blocks=parity_blocks
+        )
+
+    def get(self, file_id: str) -> Optional[FileMetadata]:
+        row = self._connection().execute(
+            "SELECT file_id, filename, size, uploaded_at, layout FROM files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        return self._build_metadata(row) if row else None
+
+    def list_files(self) -> List[FileMetadata]:
+        rows = self._connection().execute(
+            "SELECT file_id, filename, size, uploaded_at, layout FROM files ORDER BY uploaded_at"
+        ).fetchall()
+        return [self._build_metadata(row) for row in rows]
+
+    def search(self, query: str) -> List[FileMetadata]:
+        # Misma comparación que el backend JSON: str.lower() de Python (no solo ASCII,
+        # como LIKE) y subcadena literal, sin comodines
+        rows = self._connection().execute(
+            "SELECT file_id, filename, size, uploaded_at, layout FROM files "
+            "WHERE instr(filename_lower, ?) > 0 ORDER BY uploaded_at", (query.lower(),)
+        ).fetchall()
+        return [self._build_metadata(row) for row in rows]
+
+    def blocks_on_disk(self, disk_id: str) -> Iterator[DiskBlockRef]:
+        """Bloques guardados en un disco; ``file_disks`` da los archivos que tienen alguno."""
+        file_ids = [row[0] for row in self._connection().execute(
+            "SELECT file_id FROM file_disks WHERE disk_id = ? ORDER BY file_id", (disk_id,)
+        )]
+        for file_id in file_ids:
+            metadata = self.get(file_id)
+            if metadata is not None:
+                yield from file_blocks_on_disk(metadata, disk_id)
+
+    def disk_usage(self) -> Dict[str, Dict[str, int]]:
+        """Bloques y bytes que ocupa cada disco, según ``file_disks``."""
+        rows = self._connection().execute(
+            "SELECT d.disk_id, SUM(d.blocks), SUM(d.blocks * COALESCE(json_extract(f.layout, '$.block_size'), ?)) "
+            "FROM file_disks d JOIN files f ON f.file_id = d.file_id GROUP BY d.disk_id", (BLOCK_SIZE,)
+        )
+        return {disk_id: {"blocks": blocks, "bytes": used_bytes} for disk_id, blocks, used_bytes in rows}
+
+    def blocks_status(self) -> List[Dict]:
+        """Estado de todos los bloques, ordenado por nombre; las ubicaciones salen del layout."""
+        rows = self._connection().execute(
+            "SELECT file_id, filename, size, uploaded_at, layout FROM files ORDER BY filename, file_id"
+        ).fetchall()
+        return [file_blocks_status(self._build_metadata(row)) for row in rows]
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,111 @@
+"""Motores de paridad XOR para el sistema RAID 5.
+
+Ejecutar ``python -m controller.parity`` para ver el rendimiento (MB/s)
+de cada backend disponible en esta máquina.
+"""
+import os
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional; sin él se usa el backend de enteros grandes
+    np = None
+
+
+def _xor_python(blocks: Sequence[bytes]) -> bytes:
+    """Implementación original byte a byte (solo como referencia en benchmarks)."""
+    parity = bytes(blocks[0])
+    for block in blocks[1:]:
+        block = bytes(block)
+        if len(block) < len(parity):
+            block = block + b'\x00' * (len(parity) - len(block))
+        elif len(block) > len(parity):
+            parity = parity + b'\x00' * (len(block) - len(parity))
+        parity = bytes(a ^ b for a, b in zip(parity, block))
+    return parity
+
+
+def _xor_bigint(blocks: Sequence[bytes]) -> bytes:
+    """XOR de bloques completos usando enteros de precisión arbitraria."""
+    # En little-endian los bloques cortos quedan rellenados con ceros al final
+    length = max(len(block) for block in blocks)
+    accumulator = 0
+    for block in blocks:
+        accumulator ^= int.from_bytes(block, 'little')
+    return accumulator.to_bytes(length, 'little')
+
+
+def _xor_numpy(blocks: Sequence[bytes]) -> bytes:
+    """XOR vectorizado de buffers completos con NumPy."""
+    length = max(len(block) for block in blocks)
+    # Trabajar en palabras de 64 bits cuando el tamaño lo permite
+    dtype = np.uint64 if length % 8 == 0 else np.uint8
+    accumulator = np.zeros(length // np.dtype(dtype).itemsize, dtype=dtype)
+    for block in blocks:
+        if len(block) == length:
+            np.bitwise_xor(accumulator, np.frombuffer(block, dtype=dtype), out=accumulator)
+        else:
+            view = accumulator.view(np.uint8)
+            np.bitwise_xor(view[:len(block)], np.frombuffer(block, dtype=np.uint8), out=view[:len(block)])
+    return accumulator.tobytes()
+
+
+BACKENDS: Dict[str, Callable[[Sequence[bytes]], bytes]] = {
+    "python": _xor_python,
+    "bigint": _xor_bigint,
+}
+if np is not None:
+    BACKENDS["numpy"] = _xor_numpy
+
+
+def benchmark(block_size: int = 4096, num_blocks: int = 3, duration: float = 0.05,
+              backends: Optional[Sequence[str]] = None) -> Dict[str, float]:
+    """Medir el rendimiento de cada backend en MB/s de datos de entrada procesados."""
+    blocks = [os.urandom(block_size) for _ in range(num_blocks)]
+    stripe_bytes = block_size * num_blocks
+    results = {}
+    for name in backends or BACKENDS:
+        xor = BACKENDS[name]
+        iterations = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < duration:
+            xor(blocks)
+            iterations += 1
+            elapsed = time.perf_counter() - start
+        results[name] = stripe_bytes * iterations / elapsed / (1024 * 1024)
+    return results
+
+
+def select_fastest_backend(block_size: int = 4096, num_blocks: int = 3) -> str:
+    """Elegir el backend más rápido en esta máquina (se omite el de referencia)."""
+    candidates = [name for name in BACKENDS if name != "python"]
+    results = benchmark(block_size, num_blocks, duration=0.02, backends=candidates)
+    return max(results, key=results.get)
+
+
+class ParityEngine:
+    """Calcula bloques de paridad XOR con el backend seleccionado."""
+
+    def __init__(self, backend: str = "auto", block_size: int = 4096, num_blocks: int = 3):
+        if backend == "auto":
+            backend = select_fastest_backend(block_size, num_blocks)
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de paridad desconocido o no disponible: {backend}")
+        self.backend = backend
+        self._xor = BACKENDS[backend]
+
+    def xor_blocks(self, blocks: Sequence[bytes]) -> bytes:
+        """XOR de todos los bloques; los bloques cortos se rellenan con ceros."""
+        if not blocks:
+            return b''
+        return self._xor(blocks)
+
+
+if __name__ == "__main__":
+    for size in (4096, 65536):
+        print(f"Bloques de {size} bytes x 3:")
+        for name, mbps in benchmark(block_size=size, duration=0.5).items():
+            print(f"  {name:>8}: {mbps:10.1f} MB/s")
+    print(f"Backend seleccionado: {ParityEngine().backend}")
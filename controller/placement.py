@@ -0,0 +1,77 @@
+"""Colocación de franjas según el espacio libre y la carga de cada disco."""
+import math
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .layout import rotation_disk_indices
+
+if TYPE_CHECKING:
+    from .dispatcher import DiskDispatcher
+    from .schemas import DiskNodeInfo
+
+
+class StripePlacer:
+    """Elige los discos de datos y de paridad de cada franja nueva.
+
+    Cada disco recibe una puntuación: ``space_weight`` por la fracción ocupada
+    (la que informa el nodo en ``/`` más lo colocado desde entonces) y
+    ``load_weight`` por las operaciones que tiene encoladas en el despachador,
+    en unidades de ``max_concurrency``.
+
+    - Si las puntuaciones difieren menos de ``tolerance`` se usa la rotación
+      de siempre, que no ocupa nada en los metadatos.
+    - Si no, la franja usa los ``width`` discos mejor puntuados; entre ellos
+      la paridad va al peor (en lecturas normales no se lee) y los bloques de
+      datos a los mejores, en ese orden. Con franjas más estrechas que el
+      arreglo los discos más llenos o cargados quedan fuera, y en una franja
+      incompleta se quedan sin bloque.
+    - Con franjas más estrechas que el arreglo, los discos que no están en línea
+      (caídos, fallidos o en reconstrucción) tienen la peor puntuación: una
+      franja sobre ellos sería una escritura degradada habiendo discos sanos.
+      Fallan rápido, así que su cola vacía no debe hacerlos parecer los mejores.
+    """
+
+    def __init__(self, disk_nodes: Dict[str, "DiskNodeInfo"], dispatcher: "DiskDispatcher",
+                 space_weight: float, load_weight: float, tolerance: float):
+        self.disk_nodes = disk_nodes
+        self.dispatcher = dispatcher
+        self.space_weight = space_weight
+        self.load_weight = load_weight
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+
+    def _score(self, disk_id: str) -> float:
+        disk_info = self.disk_nodes[disk_id]
+        fill = disk_info.used_space / disk_info.total_space if disk_info.total_space else 1.0
+        load = self.dispatcher.depth(disk_id) / max(1, self.dispatcher.max_concurrency)
+        return self.space_weight * fill + self.load_weight * load
+
+    def place(self, stripe_number: int, disk_ids: List[str], width: int, data_blocks: int,
+              block_size: int) -> Optional[List[int]]:
+        """Discos ``[datos..., paridad]`` (índices en ``disk_ids``) de una franja.
+
+        Devuelve None si la franja sigue la rotación y no hay que guardarla.
+        """
+        rotation = rotation_disk_indices(stripe_number, len(disk_ids), width)
+        with self._lock:
+            scores = [self._score(disk_id) for disk_id in disk_ids]
+            if width < len(disk_ids):
+                for i, disk_id in enumerate(disk_ids):
+                    if self.disk_nodes[disk_id].status != "online":
+                        scores[i] = math.inf
+            healthy = [score for score in scores if score != math.inf] or [0.0]
+            if (max(healthy) - min(healthy) < self.tolerance
+                    and all(scores[i] != math.inf for i in rotation)):
+                disks = rotation
+            else:
+                # En los empates manda el orden de la rotación, empezando por su paridad
+                order = rotation[-1:] + rotation[:-1] + [i for i in range(len(disk_ids)) if i not in rotation]
+                chosen = sorted(order, key=lambda i: scores[i])[:width]
+                parity = max(chosen, key=lambda i: scores[i])
+                disks = [i for i in chosen if i != parity] + [parity]
+            # Contar ya los bloques colocados; el siguiente sondeo del nodo da la cifra real
+            for i in disks[:data_blocks] + disks[-1:]:
+                disk_info = self.disk_nodes[disk_ids[i]]
+                disk_info.used_space += block_size
+                disk_info.available_space -= block_size
+        return None if disks == rotation else disks
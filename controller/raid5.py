@@ -2,247 +2,612 @@ import hashlib
 import json
 import os
 import requests
-from typing import List, Dict, Optional, Tuple
+from typing import BinaryIO, List, Dict, Iterable, Iterator, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeoutError, wait
 from datetime import datetime
 import uuid
+import threading
+import time
 
-from .schemas import FileMetadata, SystemStatus, BlockInfo, DiskNodeInfo
+from .schemas import FileMetadata, SystemStatus, BlockInfo, DiskNodeInfo, StripeLayout
+from .parity import ParityEngine
+from .encoder import StripeEncoder
+from .layout import BlockLocation, make_block_id, rotation_disk_indices
+from .stripe_index import DiskBlockRef, StripeEntry
+from .dispatcher import DiskDispatcher
+from .placement import StripePlacer
+from .block_cache import BlockCache
+from .file_cache import FileCache
+from .rebuild import RebuildJob, ResyncJob
+from .dirty_log import DirtyStripeLog
+from .latency import LatencyTracker
+from .health import HealthChecker
+from .metadata_store import JournalMetadataStore, SQLiteMetadataStore, stored_block_size
+from .config.disk_nodes import load_disk_nodes
+from .config.settings import (
+    BLOCK_SIZE, MIN_DISKS_FOR_RAID5, STRIPE_WIDTH, DISK_NODES, DISK_NODE_CONFIGS, DISK_NODE_HOST,
+    PARITY_BACKEND, DISK_MAX_CONCURRENCY, READ_WINDOW_STRIPES, UPLOAD_CHUNK_STRIPES, DISK_POOL_SIZE,
+    BLOCK_CACHE_BYTES, FILE_CACHE_DIR, FILE_CACHE_BYTES,
+    PLACEMENT_SPACE_WEIGHT, PLACEMENT_LOAD_WEIGHT, PLACEMENT_TOLERANCE,
+    REBUILD_CHECKPOINT_FILE, DISK_REPLACEMENTS_FILE,
+    DIRTY_LOG_FILE, DISK_DATA_LOSS_RATIO, HEDGED_READS, HEDGE_PERCENTILE, HEDGE_MIN_DELAY, HEALTH_CHECK_INTERVAL, HEALTH_CHECK_TIMEOUT, HEALTH_RECOVERY_SUCCESSES, HEALTH_FAILURE_THRESHOLD, REBUILD_MAX_BYTES_PER_SEC, REBUILD_MAX_IOPS, REBUILD_PARALLEL_STRIPES,
+    METADATA_BACKEND, METADATA_FILE, METADATA_JOURNAL_FILE, METADATA_COMPACT_EVERY, METADATA_DB_FILE
+)
+
+# Estados en los que un disco acepta escrituras y borrados
+WRITABLE_STATUSES = ("online", "rebuilding")
 
 class RAID5Manager:
     """Gestor del sistema RAID 5 para TECMFS"""
     
-    def __init__(self, block_size: int = 4096, num_disks: int = 4):
+    def __init__(self, block_size: int = BLOCK_SIZE, disk_nodes: Optional[List[Dict]] = None,
+                 stripe_width: int = STRIPE_WIDTH):
         self.block_size = block_size  # 4KB por defecto
-        self.num_disks = num_disks
+        # Nodos del arreglo: DISK_NODES más las configuraciones XML de disk_node/
+        if disk_nodes is None:
+            disk_nodes = load_disk_nodes(DISK_NODES, DISK_NODE_CONFIGS, DISK_NODE_HOST)
+        self.num_disks = len(disk_nodes)
+        # Discos por franja; con menos que el arreglo las franjas se reparten por todos
+        self.stripe_width = min(stripe_width or self.num_disks, self.num_disks)
+        if self.stripe_width < MIN_DISKS_FOR_RAID5:
+            raise ValueError(
+                f"RAID 5 necesita al menos {MIN_DISKS_FOR_RAID5} discos por franja "
+                f"({self.num_disks} nodos configurados, ancho de franja {self.stripe_width})."
+            )
+        self.disk_ids: List[str] = [node["id"] for node in disk_nodes]
         self.disk_nodes = {}  # {disk_id: DiskNodeInfo}
-        self.file_metadata = {}  # {file_id: FileMetadata}
-        self.metadata_file = "metadata.json"
+        self.metadata_file = METADATA_FILE
+        self.metadata_store = self._create_metadata_store()
         self.next_stripe_number = 0 # Contador global de franjas para rotar la paridad
+        # Protege el contador de franjas entre peticiones concurrentes
+        self._metadata_lock = threading.RLock()
+        # Elegir el backend de XOR más rápido disponible al arrancar
+        self.parity_engine = ParityEngine(PARITY_BACKEND, block_size, self.stripe_width - 1)
+        self.encoder = StripeEncoder(block_size, self.stripe_width - 1, self.parity_engine)
+        # Bloques leídos recientemente, para no volver a pedirlos a los discos
+        self.block_cache = BlockCache(BLOCK_CACHE_BYTES)
+        # Latencias de lectura por disco, para cubrir bloques rezagados con la paridad
+        self.latency = LatencyTracker(percentile=HEDGE_PERCENTILE, min_delay=HEDGE_MIN_DELAY)
+        # Copias completas de los archivos descargados, servidas sin pasar por el RAID
+        self.file_cache = FileCache(FILE_CACHE_DIR, FILE_CACHE_BYTES)
         
-        # Configurar nodos de disco (esto se conectará con los Disk Nodes de la Persona 2)
-        self._setup_disk_nodes()
+        self._setup_disk_nodes(disk_nodes)
+        # Una cola de escritura/lectura por disco para despachar bloques en paralelo
+        self.dispatcher = DiskDispatcher(self.disk_nodes.keys(), DISK_MAX_CONCURRENCY)
+        # Discos de cada franja nueva según su espacio libre y su cola de trabajo
+        self.placer = StripePlacer(
+            self.disk_nodes, self.dispatcher, PLACEMENT_SPACE_WEIGHT, PLACEMENT_LOAD_WEIGHT, PLACEMENT_TOLERANCE
+        )
         self._load_metadata()
+        # Bloques que no llegaron a un disco caído, para resincronizarlo al volver
+        self.dirty_log = DirtyStripeLog(DIRTY_LOG_FILE)
+        self.dirty_log.load()
+        self._resync_jobs: Dict[str, ResyncJob] = {}
+        # Comprobación periódica de los discos; se arranca con start_health_checks()
+        self.health_checker = HealthChecker(
+            self, HEALTH_CHECK_INTERVAL, HEALTH_CHECK_TIMEOUT, HEALTH_RECOVERY_SUCCESSES, HEALTH_FAILURE_THRESHOLD,
+            DISK_DATA_LOSS_RATIO
+        )
+        # Continuar una reconstrucción de disco que quedó a medias
+        self.rebuild_job: Optional[RebuildJob] = RebuildJob.from_checkpoint(
+            self, REBUILD_CHECKPOINT_FILE, **self._rebuild_limits()
+        )
+        if self.rebuild_job:
+            print(f"Reanudando la reconstrucción del disco {self.rebuild_job.disk_id}")
+            self.rebuild_job.start()
+        else:
+            checkpoint = RebuildJob.read_checkpoint(REBUILD_CHECKPOINT_FILE)
+            if checkpoint and checkpoint.get('state') == 'failed' and checkpoint['disk_id'] in self.disk_nodes:
+                # La última reconstrucción no terminó: el disco sigue incompleto
+                self.abort_rebuild(checkpoint['disk_id'])
     
-    def _setup_disk_nodes(self):
-        """Configurar los nodos de disco (simulado por ahora)"""
-        base_url = "http://localhost"
-        for i in range(self.num_disks):
-            disk_id = f"disk_{i+1}"
-            port = 8001 + i  # Cada disco en puerto diferente
+    def _create_metadata_store(self):
+        """Crear el backend de metadatos indicado en la configuración"""
+        if METADATA_BACKEND == "sqlite":
+            # Si existe un metadata.json previo se importa la primera vez
+            return SQLiteMetadataStore(METADATA_DB_FILE, METADATA_FILE, METADATA_JOURNAL_FILE)
+        return JournalMetadataStore(METADATA_FILE, METADATA_JOURNAL_FILE, METADATA_COMPACT_EVERY)
+
+    def _setup_disk_nodes(self, disk_nodes: List[Dict]):
+        """Configurar los nodos de disco; el espacio real llega con la primera comprobación"""
+        replacements = self._load_disk_replacements()
+        for node in disk_nodes:
+            disk_id = node["id"]
             self.disk_nodes[disk_id] = DiskNodeInfo(
                 disk_id=disk_id,
-                url=f"{base_url}:{port}",
+                # Un disco reconstruido sobre otro nodo conserva su disk_id
+                url=replacements.get(disk_id, node["url"]),
                 status="online",
                 total_space=1024 * 1024 * 1024,  # 1GB
                 used_space=0,
                 available_space=1024 * 1024 * 1024
             )
+            # Conexiones keep-alive reutilizadas por todas las operaciones de bloque
+            self.disk_nodes[disk_id].open_pool(DISK_POOL_SIZE)
     
+    def _load_disk_replacements(self) -> Dict[str, str]:
+        """Nodos de reemplazo de discos reconstruidos: {disk_id: url}"""
+        if not os.path.exists(DISK_REPLACEMENTS_FILE):
+            return {}
+        try:
+            with open(DISK_REPLACEMENTS_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error cargando los discos de reemplazo: {e}")
+            return {}
+
+    def _save_disk_replacement(self, disk_id: str, url: str):
+        replacements = self._load_disk_replacements()
+        replacements[disk_id] = url
+        temp_path = DISK_REPLACEMENTS_FILE + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(replacements, f, indent=2)
+        os.replace(temp_path, DISK_REPLACEMENTS_FILE)
+
     def _load_metadata(self):
-        """Cargar metadatos desde archivo"""
-        if os.path.exists(self.metadata_file):
-            try:
-                with open(self.metadata_file, 'r') as f:
-                    data = json.load(f)
-                    loaded_files = data.get('files', {})
-                    self.file_metadata = {
-                        file_id: FileMetadata(**metadata)
-                        for file_id, metadata in loaded_files.items()
-                    }
-                    # Cargar el contador global de franjas
-                    self.next_stripe_number = data.get('next_stripe_number', 0)
-            except Exception as e:
-                print(f"Error cargando metadatos: {e}")
+        """Cargar metadatos desde el backend configurado"""
+        try:
+            # Cargar el contador global de franjas
+            self.next_stripe_number = self.metadata_store.load()
+        except Exception as e:
+            print(f"Error cargando metadatos: {e}")
     
-    def _save_metadata(self):
-        """Guardar metadatos a archivo"""
+    def _save_file_metadata(self, metadata: FileMetadata):
+        """Registrar un archivo nuevo en el backend de metadatos"""
         try:
-            with open(self.metadata_file, 'w') as f:
-                metadata_to_save = {
-                    file_id: metadata.model_dump()
-                    for file_id, metadata in self.file_metadata.items()
-                }
-                # Guardar archivos y el contador de franjas
-                full_metadata = {
-                    'files': metadata_to_save,
-                    'next_stripe_number': self.next_stripe_number
-                }
-                json.dump(full_metadata, f, indent=2)
+            self.metadata_store.put(metadata, self.next_stripe_number)
+        except Exception as e:
+            print(f"Error guardando metadatos: {e}")
+
+    def _remove_file_metadata(self, file_id: str):
+        """Eliminar un archivo del backend de metadatos"""
+        try:
+            self.metadata_store.delete(file_id, self.next_stripe_number)
         except Exception as e:
             print(f"Error guardando metadatos: {e}")
     
     def _calculate_parity(self, data_blocks: List[bytes]) -> bytes:
         """Calcular bloque de paridad usando XOR"""
-        if not data_blocks:
-            return b''
-        
-        parity = data_blocks[0]
-        for block in data_blocks[1:]:
-            # Asegurar que todos los bloques tengan la misma longitud
-            if len(block) < len(parity):
-                block = block + b'\x00' * (len(parity) - len(block))
-            elif len(block) > len(parity):
-                parity = parity + b'\x00' * (len(block) - len(parity))
-            
-            # XOR bit a bit
-            parity = bytes(a ^ b for a, b in zip(parity, block))
-        
-        return parity
-    
-    def _distribute_blocks(self, data: bytes, stripe_number: int) -> Tuple[List[bytes], bytes]:
-        """Distribuir datos en bloques y calcular paridad"""
-        blocks = []
-        
-        # Dividir datos en bloques del tamaño especificado
-        for i in range(0, len(data), self.block_size):
-            block = data[i:i + self.block_size]
-            # Rellenar el último bloque si es necesario
-            if len(block) < self.block_size:
-                block = block + b'\x00' * (self.block_size - len(block))
-            blocks.append(block)
-        
-        # Calcular paridad
-        parity_block = self._calculate_parity(blocks)
-        
-        return blocks, parity_block
-    
-    def _get_parity_disk(self, stripe_number: int) -> int:
-        """Determinar qué disco contiene la paridad para una franja específica"""
-        # Distribución rotativa de paridad (RAID 5)
-        return stripe_number % self.num_disks
+        return self.parity_engine.xor_blocks(data_blocks)
     
+    def _reserve_stripes(self, stripe_count: int) -> int:
+        """Reservar ``stripe_count`` números globales de franja y devolver el primero.
+
+        Las franjas de un archivo usan números consecutivos a partir de este, así
+        su ubicación se calcula con la rotación de paridad sin guardar un mapa
+        por bloque. Si se conoce el tamaño se reserva el rango completo y las
+        subidas solapadas no comparten números; si no, se reserva uno y el resto
+        se toma al terminar (y entonces sí pueden compartirse, lo que solo afecta
+        al reparto de la paridad, no a la ubicación de cada archivo). Los números
+        no se reutilizan aunque la subida falle.
+        """
+        with self._metadata_lock:
+            first_stripe = self.next_stripe_number
+            self.next_stripe_number += max(1, stripe_count)
+            return first_stripe
+
+    def _advance_stripes(self, first_stripe: int, stripe_count: int):
+        """Avanzar el contador global más allá de las franjas usadas por una subida."""
+        with self._metadata_lock:
+            self.next_stripe_number = max(self.next_stripe_number, first_stripe + stripe_count)
+
     def _get_block_id(self, file_id: str, block_index: str) -> str:
         """Generar ID único para un bloque"""
-        return f"{file_id}_block_{block_index}"
+        return make_block_id(file_id, block_index)
     
     def store_file(self, filename: str, content: bytes) -> str:
         """Almacenar un archivo usando RAID 5"""
+        # Todo el contenido ya está en memoria: codificarlo de una sola pasada
+        return self._store_chunks(filename, [content], len(content))
+
+    def store_stream(self, filename: str, stream: BinaryIO) -> str:
+        """Almacenar un archivo leyéndolo por trozos de franjas completas.
+
+        La memoria usada por una subida queda acotada a unas pocas franjas
+        (``UPLOAD_CHUNK_STRIPES`` por trozo) sin importar el tamaño del archivo.
+        """
+        chunk_size = self.encoder.stripe_size * UPLOAD_CHUNK_STRIPES
+        return self._store_chunks(filename, self._read_chunks(stream, chunk_size), self._stream_size(stream))
+
+    def _stream_size(self, stream: BinaryIO) -> Optional[int]:
+        """Bytes que quedan en el stream si admite seek (las subidas van a un archivo temporal)."""
+        try:
+            position = stream.tell()
+            size = stream.seek(0, os.SEEK_END) - position
+            stream.seek(position)
+            return size
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def _read_chunks(self, stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+        """Leer trozos de tamaño exacto (salvo el último) para no desalinear las franjas."""
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            while len(chunk) < chunk_size:
+                more = stream.read(chunk_size - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            yield chunk
+
+    def _store_chunks(self, filename: str, chunks: Iterable[bytes], size_hint: Optional[int] = None) -> str:
+        """Codificar y enviar cada trozo a los discos mientras se lee el siguiente."""
         file_id = str(uuid.uuid4())
         
-        # Dividir datos en franjas (stripes) y bloques
-        stripes = [content[i:i+self.block_size * (self.num_disks - 1)] for i in range(0, len(content), self.block_size * (self.num_disks - 1))]
-        
-        block_locations = {}
-        parity_locations = {}
-
-        for i, stripe_data in enumerate(stripes):
-            # Usar y luego incrementar el contador global para determinar el disco de paridad
-            current_stripe_num = self.next_stripe_number
-            self.next_stripe_number += 1
-
-            data_blocks, parity_block = self._distribute_blocks(stripe_data, current_stripe_num)
-            
-            parity_disk_index = self._get_parity_disk(current_stripe_num)
-            data_disk_indices = [j for j in range(self.num_disks) if j != parity_disk_index]
-            
-            # Distribuir y almacenar bloques de datos
-            for j, block_data in enumerate(data_blocks):
-                disk_index = data_disk_indices[j]
-                disk_id = f"disk_{disk_index + 1}"
-                block_id = self._get_block_id(file_id, f"{i}_{j}")
-                
-                self._store_block_to_disk(disk_id, block_id, block_data)
-                block_locations[block_id] = disk_id
-
-            # Almacenar bloque de paridad
-            parity_disk_id = f"disk_{parity_disk_index + 1}"
-            parity_block_id = self._get_block_id(file_id, f"parity_{i}")
-            self._store_block_to_disk(parity_disk_id, parity_block_id, parity_block)
-            parity_locations[parity_block_id] = parity_disk_id
+        stripe_size = self.encoder.stripe_size
+        first_stripe = self._reserve_stripes(-(-size_hint // stripe_size) if size_hint else 1)
+        # Bloques enviados, para poder deshacer la subida si falla
+        written_blocks: Dict[str, str] = {}
+        # Escrituras en curso por trozo: [(índice de franja, block_id, future)]
+        pending_chunks = deque()
+        failed_stripes: Dict[int, List[str]] = {}
+        # Franjas que la colocación sacó de la rotación: índice -> [datos..., paridad]
+        disk_map: Dict[int, List[int]] = {}
+        disk_ids = self.disk_ids
+        size = 0
+        stripe_offset = 0
+
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                # Dividir el trozo en franjas (stripes) y calcular toda su paridad de una vez
+                stripes = self.encoder.encode(chunk)
+                pending_writes = []
+
+                for i, data_blocks, parity_block in stripes:
+                    i += stripe_offset
+                    # Rotación de paridad por número global de franja, salvo que un
+                    # disco esté bastante más lleno o cargado que los demás
+                    placement = self.placer.place(
+                        first_stripe + i, disk_ids, self.stripe_width, len(data_blocks), self.block_size
+                    )
+                    if placement is not None:
+                        disk_map[i] = placement
+                    stripe_disks = placement or rotation_disk_indices(first_stripe + i, self.num_disks, self.stripe_width)
+                    
+                    # Encolar los bloques de datos en la cola de cada disco
+                    for j, block_data in enumerate(data_blocks):
+                        disk_id = disk_ids[stripe_disks[j]]
+                        block_id = self._get_block_id(file_id, f"{i}_{j}")
+                        
+                        future = self.dispatcher.submit(disk_id, self._store_block_to_disk, disk_id, block_id, block_data)
+                        pending_writes.append((i, block_id, future))
+                        written_blocks[block_id] = disk_id
+
+                    # Encolar el bloque de paridad
+                    parity_disk_id = disk_ids[stripe_disks[-1]]
+                    parity_block_id = self._get_block_id(file_id, f"parity_{i}")
+                    future = self.dispatcher.submit(parity_disk_id, self._store_block_to_disk, parity_disk_id, parity_block_id, parity_block)
+                    pending_writes.append((i, parity_block_id, future))
+                    written_blocks[parity_block_id] = parity_disk_id
+
+                stripe_offset += len(stripes)
+                pending_chunks.append(pending_writes)
+                # Un trozo se envía mientras se lee y codifica el siguiente
+                while len(pending_chunks) > 1:
+                    self._collect_writes(pending_chunks.popleft(), failed_stripes)
+
+            while pending_chunks:
+                self._collect_writes(pending_chunks.popleft(), failed_stripes)
+        except Exception:
+            # Deshacer lo escrito y no registrar el archivo
+            for pending_writes in pending_chunks:
+                for _, _, future in pending_writes:
+                    future.cancel()
+            self._delete_blocks(written_blocks)
+            raise
+        finally:
+            self._advance_stripes(first_stripe, stripe_offset)
+
+        if failed_stripes:
+            print(f"Advertencia: {len(failed_stripes)} franjas de {file_id} quedaron en modo degradado.")
+            # Registrar los bloques que faltan antes de publicar el archivo, para
+            # regenerarlos cuando su disco vuelva
+            dirty: Dict[str, List[DiskBlockRef]] = {}
+            for stripe_index, block_ids in failed_stripes.items():
+                for block_id in block_ids:
+                    dirty.setdefault(written_blocks[block_id], []).append(DiskBlockRef(file_id, stripe_index, block_id))
+            for disk_id, refs in dirty.items():
+                self.dirty_log.mark_dirty(disk_id, refs)
 
         # Crear metadatos del archivo
         file_metadata = FileMetadata(
             file_id=file_id,
             filename=filename,
-            size=len(content),
+            size=size,
             uploaded_at=datetime.now().isoformat(),
-            blocks=block_locations,
-            parity_blocks=parity_locations
+            layout=StripeLayout(
+                first_stripe=first_stripe,
+                stripe_count=stripe_offset,
+                block_size=self.block_size,
+                data_disks=self.stripe_width - 1,
+                disk_map=disk_map,
+                disks=disk_ids
+            )
         )
         
         # Guardar metadatos
-        self.file_metadata[file_id] = file_metadata
-        self._save_metadata()
+        self._save_file_metadata(file_metadata)
         
         return file_id
+
+    def _collect_writes(self, pending_writes: List[Tuple[int, str, Future]], failed_stripes: Dict[int, List[str]]):
+        """Esperar las escrituras de un trozo y agrupar los fallos por franja."""
+        for stripe_index, block_id, future in pending_writes:
+            if not future.result():
+                failed_stripes.setdefault(stripe_index, []).append(block_id)
+        unrecoverable = [index for index, blocks in failed_stripes.items() if len(blocks) > 1]
+        if unrecoverable:
+            # Sin redundancia suficiente en alguna franja
+            raise Exception(f"Fallo de disco múltiple al escribir las franjas {sorted(unrecoverable)}.")
     
-    def _store_block_to_disk(self, disk_id: str, block_id: str, data: bytes):
+    def _store_block_to_disk(self, disk_id: str, block_id: str, data: bytes) -> bool:
         """Almacenar un bloque en un disco específico haciendo una llamada HTTP."""
         disk_info = self.disk_nodes.get(disk_id)
-        if not disk_info or disk_info.status != "online":
+        if not disk_info or disk_info.status not in WRITABLE_STATUSES:
             print(f"Error: Disco {disk_id} no está disponible.")
-            return
+            return False
 
         try:
-            payload = {"block_id": block_id, "data": data.hex()}
-            response = requests.post(f"{disk_info.url}/store", json=payload, timeout=5)
+            if self._supports_binary(disk_info):
+                response = disk_info.pool.post(
+                    f"/store/{block_id}", data=data,
+                    headers={"Content-Type": "application/octet-stream"}
+                )
+            else:
+                payload = {"block_id": block_id, "data": data.hex()}
+                response = disk_info.pool.post("/store", json=payload)
             response.raise_for_status()  # Lanza una excepción para errores HTTP (4xx o 5xx)
             print(f"Bloque {block_id} almacenado exitosamente en {disk_id}.")
+            return True
         except requests.exceptions.RequestException as e:
             print(f"Error almacenando bloque {block_id} en disco {disk_id}: {e}")
-            # Marcar el disco como offline si falla la conexión
-            self.disk_nodes[disk_id].status = "offline"
+            # Marcar el disco como offline si falla la conexión (un disco en
+            # reconstrucción sigue así: el trabajo decide si falla)
+            if disk_info.status != "rebuilding": self.disk_nodes[disk_id].status = "offline"
+            return False
+
+    def _supports_binary(self, disk_info: DiskNodeInfo) -> bool:
+        """Consultar (una sola vez) si el nodo acepta bloques en binario crudo."""
+        if disk_info.binary_transport is None:
+            try:
+                response = disk_info.pool.get("/")
+                response.raise_for_status()
+                disk_info.binary_transport = "binary" in response.json().get("features", [])
+            except (requests.exceptions.RequestException, ValueError):
+                # Sin respuesta no se puede saber; usar hex por ahora y reintentar luego
+                return False
+        return disk_info.binary_transport
+
+    def get_file(self, file_id: str) -> Optional[FileMetadata]:
+        """Obtener los metadatos de un archivo"""
+        return self.metadata_store.get(file_id)
 
     def retrieve_file(self, file_id: str) -> Optional[Dict]:
         """Recuperar un archivo del sistema RAID 5"""
-        if file_id not in self.file_metadata:
+        metadata = self.metadata_store.get(file_id)
+        if metadata is None:
             return None
         
-        metadata = self.file_metadata[file_id]
-        
-        # 1. Intentar recuperar todos los bloques de datos
-        retrieved_blocks: Dict[str, bytes] = {}
-        failed_blocks: Dict[str, str] = {} # {block_id: disk_id}
-        
-        for block_id, disk_id in metadata.blocks.items():
-            block_data = self._retrieve_block_from_disk(block_id, disk_id)
-            if block_data is not None:
-                retrieved_blocks[block_id] = block_data
-            else:
-                failed_blocks[block_id] = disk_id
-        
-        # 2. Si faltan bloques, iniciar la reconstrucción
-        if failed_blocks:
-            print(f"Faltan {len(failed_blocks)} bloques. Iniciando reconstrucción...")
-            try:
-                reconstructed_data = self._reconstruct_data(metadata, failed_blocks, retrieved_blocks)
-                retrieved_blocks.update(reconstructed_data)
-            except Exception as e:
-                print(f"Error durante la reconstrucción: {e}")
-                raise HTTPException(status_code=500, detail=f"No se pudo reconstruir el archivo: {e}")
-
-        # 3. Reconstruir el archivo original en orden
-        # Asegurarse de que todos los bloques de datos están presentes después de la reconstrucción
-        if len(retrieved_blocks) < len(metadata.blocks):
-             raise HTTPException(status_code=500, detail="Fallo irrecuperable de disco, no se puede reconstruir el archivo.")
-
-        sorted_block_ids = sorted(metadata.blocks.keys())
-        full_content = b''.join(retrieved_blocks[block_id] for block_id in sorted_block_ids)
-        
-        # Remover padding
-        original_size = metadata.size
-        full_content = full_content[:original_size]
+        full_content = b''.join(self.iter_file_stripes(metadata))
 
         return {
             'filename': metadata.filename,
             'content': full_content,
         }
-    
-    def _retrieve_block_from_disk(self, block_id: str, disk_id: str) -> Optional[bytes]:
-        """Recuperar un bloque de un disco específico."""
+
+    def open_cached_file(self, file_id: str) -> Optional[BinaryIO]:
+        """Abrir la copia local de un archivo ya reconstruido, si existe."""
+        return self.file_cache.open(file_id)
+
+    def iter_file(self, metadata: FileMetadata) -> Iterator[bytes]:
+        """Recuperar el archivo completo guardando una copia en la caché local."""
+        return self.file_cache.tee(metadata.file_id, metadata.size, self.iter_file_stripes(metadata))
+
+    def _stripe_size(self, metadata: FileMetadata) -> int:
+        """Bytes de datos por franja con el ancho con que se escribió el archivo"""
+        if metadata.layout is not None:
+            return metadata.layout.block_size * metadata.layout.data_disks
+        return stored_block_size(metadata) * max((len(entry.data_blocks) for entry in metadata.stripe_index()), default=1)
+
+    def iter_file_stripes(self, metadata: FileMetadata, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Recuperar el archivo (o el rango [start, end)) franja por franja, en orden y sin padding.
+
+        Solo se piden los bloques de datos que cubren el rango, y la reconstrucción
+        en modo degradado se limita a esas franjas. Los bloques de las siguientes
+        ``READ_WINDOW_STRIPES`` franjas se piden en paralelo a todos los discos;
+        cada franja se entrega en cuanto llegan sus bloques, mientras las
+        siguientes siguen en vuelo.
+        """
+        end = metadata.size if end is None else min(end, metadata.size)
+        if start >= end:
+            return
+        stripes = metadata.stripe_index()
+        # Desplazamientos y padding con el tamaño de bloque con que se escribió el archivo
+        block_size = stored_block_size(metadata)
+        stripe_size = self._stripe_size(metadata)
+        first_stripe = start // stripe_size
+        last_stripe = (end - 1) // stripe_size
+        in_flight = deque()
+        next_to_submit = first_stripe
+
+        def submit_stripe(stripe_index: int):
+            # Elegir solo los bloques de la franja que se solapan con el rango
+            stripe_start = stripe_index * stripe_size
+            first_block = max(0, (start - stripe_start) // block_size)
+            last_block = (min(end, stripe_start + stripe_size) - 1 - stripe_start) // block_size
+            wanted = stripes[stripe_index].data_blocks[first_block:last_block + 1]
+            known_blocks, to_fetch = self._plan_stripe_read(stripes[stripe_index], wanted)
+            submitted_at = time.monotonic()
+            fetches = [
+                (block_id, disk_id, self.dispatcher.submit(
+                    disk_id, self._retrieve_block_from_disk, block_id, disk_id, queued_at=submitted_at
+                ))
+                for block_id, disk_id in to_fetch
+            ]
+            return stripe_start + first_block * block_size, stripes[stripe_index], wanted, known_blocks, fetches, submitted_at
+
+        for stripe_index in range(first_stripe, last_stripe + 1):
+            # Mantener la ventana de lecturas llena
+            while next_to_submit <= last_stripe and next_to_submit < stripe_index + READ_WINDOW_STRIPES:
+                in_flight.append(submit_stripe(next_to_submit))
+                next_to_submit += 1
+
+            # 1. Esperar los bloques pedidos de la franja actual (datos y, si hace falta, paridad)
+            data_offset, entry, wanted, retrieved_blocks, fetches, submitted_at = in_flight.popleft()
+            self._collect_stripe_blocks(entry, wanted, fetches, retrieved_blocks, submitted_at, block_size)
+            failed_blocks: Dict[str, str] = {
+                block_id: disk_id for block_id, disk_id in wanted if block_id not in retrieved_blocks
+            }
+
+            # 2. Si faltan bloques, reconstruir solo esta franja
+            if failed_blocks:
+                print(f"Faltan {len(failed_blocks)} bloques en la franja {stripe_index}. Iniciando reconstrucción...")
+                try:
+                    reconstructed_data = self._reconstruct_data(metadata, failed_blocks, retrieved_blocks)
+                    retrieved_blocks.update(reconstructed_data)
+                except Exception as e:
+                    print(f"Error durante la reconstrucción: {e}")
+                    raise Exception(f"No se pudo reconstruir el archivo: {e}")
+
+            # 3. Entregar la parte de la franja dentro del rango, sin el padding del final.
+            # Los bloques heredados pueden estar guardados sin padding: completarlos
+            # para que los desplazamientos coincidan con la disposición aritmética.
+            stripe_data = b''.join(
+                retrieved_blocks[block_id].ljust(block_size, b'\0') for block_id, _ in wanted
+            )
+            yield stripe_data[max(0, start - data_offset):end - data_offset]
+
+    def _collect_stripe_blocks(self, entry: StripeEntry, wanted: List[BlockLocation],
+                               fetches: List[Tuple[str, str, Future]], retrieved_blocks: Dict[str, bytes],
+                               submitted_at: float, block_size: int):
+        """Esperar los bloques de una franja, cubriendo con la paridad un bloque rezagado.
+
+        Si un bloque de datos tarda desde que se encoló más que el umbral de
+        cobertura (percentil de latencia típico de los discos, medido también
+        desde que se encola), se piden la paridad y los demás bloques de la
+        franja y se usa lo que llegue antes: el bloque o su XOR.
+        """
+        hedge_delay = self.latency.hedge_delay() if HEDGED_READS else None
+        deadline = submitted_at + hedge_delay if hedge_delay is not None else None
+        wanted_ids = {block_id for block_id, _ in wanted}
+        for block_id, disk_id, future in fetches:
+            if block_id in retrieved_blocks:
+                continue  # Ya reconstruido por una lectura cubierta
+            block_data = None
+            if deadline is not None and block_id in wanted_ids:
+                try:
+                    block_data = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    # Solo se puede cubrir un bloque por franja con una paridad
+                    deadline = None
+                    block_data = self._hedge_block(entry, block_id, future, fetches, retrieved_blocks, block_size)
+            else:
+                block_data = future.result()
+            if block_data is not None:
+                retrieved_blocks[block_id] = block_data
+
+    def _hedge_block(self, entry: StripeEntry, late_block_id: str, late_future: Future,
+                     fetches: List[Tuple[str, str, Future]], retrieved_blocks: Dict[str, bytes],
+                     block_size: int) -> Optional[bytes]:
+        """Carrera entre un bloque rezagado y su reconstrucción con la paridad."""
+        in_flight = {block_id: future for block_id, _, future in fetches}
+        sibling_futures = {}
+        for block_id, disk_id in entry.all_blocks():
+            if block_id == late_block_id or block_id in retrieved_blocks:
+                continue
+            sibling_futures[block_id] = in_flight.get(block_id) or self.dispatcher.submit(
+                disk_id, self._retrieve_block_from_disk, block_id, disk_id, queued_at=time.monotonic()
+            )
+
+        pending = set(sibling_futures.values()) | {late_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if late_future in done and late_future.result() is not None:
+                self.latency.record_hedge(won=False)
+                return late_future.result()
+            if all(future.done() for future in sibling_futures.values()):
+                siblings = {block_id: future.result() for block_id, future in sibling_futures.items()}
+                if all(data is not None for data in siblings.values()):
+                    siblings.update(retrieved_blocks)
+                    block_data = self._calculate_parity([
+                        siblings[block_id].ljust(block_size, b'\0')
+                        for block_id, _ in entry.all_blocks() if block_id != late_block_id
+                    ])
+                    self.block_cache.put(late_block_id, block_data)
+                    self.latency.record_hedge(won=True)
+                    return block_data
+                if late_future.done():
+                    return None  # Ni el bloque ni su reconstrucción: lo resuelve el modo degradado
+        return None
+
+    def _plan_stripe_read(self, entry: StripeEntry, wanted: List[BlockLocation]) -> Tuple[Dict[str, bytes], List[BlockLocation]]:
+        """Decidir qué bloques de una franja pedir en un solo lote paralelo.
+
+        Si algún bloque pedido está en un disco caído (y no en la caché), se piden
+        además la paridad y el resto de bloques de datos de la franja, para
+        recuperarlo con un XOR sin una segunda ronda de lecturas. Devuelve los
+        bloques ya disponibles en caché y la lista de bloques a pedir.
+        """
+        known_blocks: Dict[str, bytes] = {}
+        unavailable = set()
+        for block_id, disk_id in wanted:
+            disk_info = self.disk_nodes.get(disk_id)
+            if disk_info is None or disk_info.status != "online":
+                cached = self.block_cache.get(block_id)
+                if cached is None:
+                    unavailable.add(block_id)
+                else:
+                    known_blocks[block_id] = cached
+        if not unavailable:
+            return known_blocks, [location for location in wanted if location[0] not in known_blocks]
+        # Lectura degradada: todos los supervivientes de la franja, paridad incluida
+        return known_blocks, [
+            location for location in entry.all_blocks()
+            if location[0] not in unavailable and location[0] not in known_blocks
+        ]
+
+    def _retrieve_block_from_disk(self, block_id: str, disk_id: str, use_cache: bool = True,
+                                  queued_at: Optional[float] = None) -> Optional[bytes]:
+        """Recuperar un bloque de la caché o, si no está, de su disco."""
+        block_data = self.block_cache.get(block_id) if use_cache else None
+        if block_data is None:
+            block_data = self._fetch_block_from_disk(block_id, disk_id, queued_at)
+            if block_data is not None and use_cache:
+                self.block_cache.put(block_id, block_data)
+        return block_data
+
+    def _fetch_block_from_disk(self, block_id: str, disk_id: str, queued_at: Optional[float] = None) -> Optional[bytes]:
+        """Recuperar un bloque de un disco específico.
+
+        La latencia que se anota cuenta desde ``queued_at`` (cuando se encoló en
+        el despachador), igual que el plazo de las lecturas cubiertas: la espera
+        en la cola de un disco lento es parte de su lentitud.
+        """
         disk_info = self.disk_nodes.get(disk_id)
         if not disk_info or disk_info.status != "online":
             print(f"Error: Disco {disk_id} no está disponible para leer el bloque {block_id}.")
-            # Marcar como offline si no lo estaba ya
-            if disk_info: self.disk_nodes[disk_id].status = "offline"
+            # Marcar como offline si no lo estaba ya (un disco en reconstrucción sigue así)
+            if disk_info and disk_info.status != "rebuilding": self.disk_nodes[disk_id].status = "offline"
             return None
 
         try:
-            response = requests.get(f"{disk_info.url}/retrieve/{block_id}", timeout=5)
-            if response.status_code == 200:
-                hex_data = response.json().get("data")
-                return bytes.fromhex(hex_data)
-            elif response.status_code == 404:
+            started = queued_at if queued_at is not None else time.monotonic()
+            if self._supports_binary(disk_info):
+                response = disk_info.pool.get(f"/retrieve/{block_id}/raw")
+                if response.status_code == 200:
+                    self.latency.record(disk_id, time.monotonic() - started)
+                    return response.content
+            else:
+                response = disk_info.pool.get(f"/retrieve/{block_id}")
+                if response.status_code == 200:
+                    self.latency.record(disk_id, time.monotonic() - started)
+                    hex_data = response.json().get("data")
+                    return bytes.fromhex(hex_data)
+            if response.status_code == 404:
                 print(f"Error: Bloque {block_id} no encontrado en disco {disk_id} donde debería estar.")
                 return None
         except requests.exceptions.RequestException as e:
@@ -251,91 +616,90 @@ class RAID5Manager:
         
         return None
     
-    def _reconstruct_data(self, metadata: FileMetadata, failed_blocks: Dict[str, str], retrieved_blocks: Dict[str, bytes]) -> Dict[str, bytes]:
-        """Reconstruir datos usando bloques de paridad."""
+    def _reconstruct_data(self, metadata: FileMetadata, failed_blocks: Dict[str, str], retrieved_blocks: Dict[str, bytes],
+                          use_cache: bool = True) -> Dict[str, bytes]:
+        """Reconstruir datos usando bloques de paridad, una franja cada vez."""
         reconstructed_blocks = {}
-        all_stripe_blocks = metadata.blocks | metadata.parity_blocks
+        stripes = metadata.stripe_index()
+        block_size = stored_block_size(metadata)
 
-        # Organizar bloques por franja (stripe)
-        stripes: Dict[int, Dict[str, str]] = {}
-        for block_id, disk_id in all_stripe_blocks.items():
-            try:
-                # Extraer el índice de la franja del ID del bloque
-                parts = block_id.split('_')
-                # Lógica corregida para parsear el ID del bloque de paridad
-                if parts[-2] == 'parity':
-                    stripe_index = int(parts[-1])
-                else:
-                    stripe_index = int(parts[-2])
-                
-                if stripe_index not in stripes:
-                    stripes[stripe_index] = {}
-                stripes[stripe_index][block_id] = disk_id
-            except (IndexError, ValueError):
-                print(f"Advertencia: No se pudo determinar la franja para el bloque {block_id}")
-
-        # Intentar reconstruir cada bloque fallido
-        for failed_block_id in list(failed_blocks.keys()): # Usar list para poder modificar el dict
-            # Lógica de parseo corregida
-            parts = failed_block_id.split('_')
-            if parts[-2] == 'parity':
-                stripe_index = int(parts[-1])
-            else:
-                stripe_index = int(parts[-2])
-
-            stripe = stripes.get(stripe_index, {})
-            
-            # Reunir todos los bloques existentes de la franja (datos y paridad)
-            blocks_for_xor = []
-            for sibling_block_id, sibling_disk_id in stripe.items():
-                if sibling_block_id != failed_block_id:
-                    # Si ya lo tenemos, usarlo. Si no, recuperarlo.
-                    block_data = retrieved_blocks.get(sibling_block_id)
-                    if not block_data:
-                        block_data = self._retrieve_block_from_disk(sibling_block_id, sibling_disk_id)
-                    
-                    if block_data is None:
-                        # Esto indica un segundo fallo en la misma franja
-                        raise Exception(f"Fallo de disco múltiple irrecuperable en la franja {stripe_index}.")
-                    
-                    blocks_for_xor.append(block_data)
-            
-            # La magia del XOR: A^B^P = C
-            reconstructed_block = self._calculate_parity(blocks_for_xor)
+        # Agrupar los bloques fallidos por franja
+        failed_by_stripe: Dict[int, List[str]] = {}
+        for failed_block_id in failed_blocks:
+            stripe_index = stripes.stripe_of(failed_block_id)
+            if stripe_index is None:
+                raise Exception(f"El bloque {failed_block_id} no pertenece al archivo {metadata.file_id}.")
+            failed_by_stripe.setdefault(stripe_index, []).append(failed_block_id)
+
+        for stripe_index, failed_ids in failed_by_stripe.items():
+            if len(failed_ids) > 1:
+                raise Exception(f"Fallo de disco múltiple irrecuperable en la franja {stripe_index}.")
+            failed_block_id = failed_ids[0]
+            siblings = [location for location in stripes[stripe_index].all_blocks() if location[0] != failed_block_id]
+
+            # Pedir en paralelo los hermanos (datos y paridad) que aún no tenemos
+            pending = [
+                (block_id, self.dispatcher.submit(
+                    disk_id, self._retrieve_block_from_disk, block_id, disk_id, use_cache, queued_at=time.monotonic()
+                ))
+                for block_id, disk_id in siblings if block_id not in retrieved_blocks
+            ]
+            for block_id, future in pending:
+                block_data = future.result()
+                if block_data is None:
+                    # Esto indica un segundo fallo en la misma franja
+                    raise Exception(f"Fallo de disco múltiple irrecuperable en la franja {stripe_index}.")
+                retrieved_blocks[block_id] = block_data
+
+            # La magia del XOR: A^B^P = C, todos los bloques de la franja en una pasada
+            reconstructed_block = self._calculate_parity([
+                retrieved_blocks[block_id].ljust(block_size, b'\0') for block_id, _ in siblings
+            ])
             reconstructed_blocks[failed_block_id] = reconstructed_block
+            # Las siguientes lecturas del bloque no necesitan repetir el XOR
+            if use_cache:
+                self.block_cache.put(failed_block_id, reconstructed_block)
             # Quitar de la lista de fallidos porque ya lo reconstruimos
-            del failed_blocks[failed_block_id] 
+            del failed_blocks[failed_block_id]
             print(f"Bloque {failed_block_id} reconstruido exitosamente.")
 
         return reconstructed_blocks
     
     def delete_file(self, file_id: str) -> bool:
         """Eliminar un archivo del sistema"""
-        if file_id not in self.file_metadata:
+        metadata = self.metadata_store.get(file_id)
+        if metadata is None:
             return False
         
-        metadata = self.file_metadata[file_id]
         
+        self.file_cache.invalidate(file_id)
         # Eliminar bloques de datos y paridad
-        all_blocks = metadata.blocks | metadata.parity_blocks
-        for block_id, disk_id in all_blocks.items():
-            self._delete_block_from_disk(block_id, disk_id)
+        self._delete_blocks(metadata.block_locations() | metadata.parity_locations())
         
         # Eliminar metadatos
-        del self.file_metadata[file_id]
-        self._save_metadata()
+        self._remove_file_metadata(file_id)
         
         return True
     
+    def _delete_blocks(self, blocks: Dict[str, str]):
+        """Eliminar en paralelo un conjunto de bloques {block_id: disk_id}."""
+        self.block_cache.invalidate(blocks)
+        futures = [
+            self.dispatcher.submit(disk_id, self._delete_block_from_disk, block_id, disk_id)
+            for block_id, disk_id in blocks.items()
+        ]
+        for future in futures:
+            future.result()
+
     def _delete_block_from_disk(self, block_id: str, disk_id: str):
         """Eliminar un bloque de un disco específico."""
         disk_info = self.disk_nodes.get(disk_id)
-        if not disk_info or disk_info.status != "online":
+        if not disk_info or disk_info.status not in WRITABLE_STATUSES:
             print(f"Info: Disco {disk_id} ya no está disponible para borrar el bloque {block_id}.")
             return
 
         try:
-            response = requests.delete(f"{disk_info.url}/delete/{block_id}", timeout=5)
+            response = disk_info.pool.delete(f"/delete/{block_id}")
             if response.status_code not in [200, 404]:
                 response.raise_for_status()
         except requests.exceptions.RequestException as e:
@@ -344,51 +708,224 @@ class RAID5Manager:
     
     def list_files(self) -> List[FileMetadata]:
         """Listar todos los archivos almacenados"""
-        return list(self.file_metadata.values())
+        return self.metadata_store.list_files()
     
     def search_files(self, query: str) -> List[FileMetadata]:
         """Buscar archivos por nombre"""
-        results = []
-        query_lower = query.lower()
-        
-        for metadata in self.file_metadata.values():
-            if query_lower in metadata.filename.lower():
-                results.append(metadata)
-        
-        return results
+        return self.metadata_store.search(query)
     
+    def blocks_on_disk(self, disk_id: str) -> Iterator[DiskBlockRef]:
+        """Bloques guardados en un disco, según el índice inverso de metadatos."""
+        return self.metadata_store.blocks_on_disk(disk_id)
+
+    def get_disk_usage(self) -> Dict[str, Dict]:
+        """Bloques y bytes de cada disco, con su estado."""
+        usage = self.metadata_store.disk_usage()
+        dirty = self.dirty_log.counts()
+        return {
+            disk_id: {
+                "status": disk.status,
+                "dirty_blocks": dirty.get(disk_id, 0),
+                "blocks": usage.get(disk_id, {}).get("blocks", 0),
+                "used_bytes": usage.get(disk_id, {}).get("bytes", 0),
+                "total_space": disk.total_space,
+                "reported_used_space": disk.used_space,
+                "queue_depth": self.dispatcher.depth(disk_id),
+            }
+            for disk_id, disk in self.disk_nodes.items()
+        }
+
     def get_all_blocks_status(self) -> List[Dict]:
         """Recopila y devuelve el estado de todos los bloques de todos los archivos."""
-        status_list = []
-        for file_id, metadata in self.file_metadata.items():
-            blocks = []
-            # Bloques de datos
-            for block_id, disk_id in metadata.blocks.items():
-                blocks.append({
-                    "block_id": block_id,
-                    "disk_id": disk_id,
-                    "type": "data"
-                })
-            # Bloques de paridad
-            for block_id, disk_id in metadata.parity_blocks.items():
-                blocks.append({
-                    "block_id": block_id,
-                    "disk_id": disk_id,
-                    "type": "parity"
-                })
-            
-            file_status = {
-                "file_id": file_id,
-                "filename": metadata.filename,
-                "blocks": sorted(blocks, key=lambda x: x['block_id']) # Ordenar para consistencia
-            }
-            status_list.append(file_status)
-            
-        return sorted(status_list, key=lambda x: x['filename']) # Ordenar por nombre de archivo
+        return self.metadata_store.blocks_status()
     
+    def start_health_checks(self):
+        """Empezar a consultar el estado de los discos en segundo plano."""
+        self.health_checker.start()
+        # Terminar resincronizaciones que quedaron pendientes antes de un reinicio
+        for disk_id, disk in self.disk_nodes.items():
+            if disk.status == "online":
+                self.start_resync(disk_id)
+
+    def start_resync(self, disk_id: str):
+        """Regenerar en segundo plano los bloques que se escribieron con el disco caído."""
+        if not self.dirty_log.pending(disk_id):
+            return
+        job = self._resync_jobs.get(disk_id)
+        if job and job.is_running():
+            return
+        job = ResyncJob(self, disk_id, self.dirty_log, **self._rebuild_limits())
+        self._resync_jobs[disk_id] = job
+        job.start()
+
+    def mark_disk_online(self, disk_id: str, reported_used: Optional[int] = None) -> bool:
+        """Volver a usar un disco que responde otra vez.
+
+        - Un disco con una reconstrucción sin terminar (en curso o fallida) no
+          vuelve: le faltan bloques y solo lo completa otra reconstrucción.
+        - Si el nodo informa de mucho menos espacio usado del que le corresponde
+          según los metadatos (``reported_used``), perdió sus bloques: se marca
+          como ``failed`` y hay que reconstruirlo.
+        - Si no, los bloques que le falten según su lista pasan al registro de
+          franjas sucias y se regeneran con la resincronización.
+
+        Devuelve si quedó en línea.
+        """
+        disk_info = self.disk_nodes[disk_id]
+        if self._has_unfinished_rebuild(disk_id):
+            print(f"Disco {disk_id} responde, pero su reconstrucción no terminó; hay que repetirla (POST /rebuild).")
+            disk_info.status = "failed"
+            return False
+        if reported_used is not None and not self.verify_disk_data(disk_id, reported_used):
+            return False
+        if not self.reconcile_disk(disk_id):
+            return False
+        # El nodo pudo reiniciarse con otra versión: volver a consultar sus capacidades
+        disk_info.binary_transport = None
+        disk_info.status = "online"
+        self.start_resync(disk_id)
+        return True
+
+    def _has_unfinished_rebuild(self, disk_id: str) -> bool:
+        if self.rebuild_job is not None and self.rebuild_job.disk_id == disk_id:
+            return self.rebuild_job.state != "completed"
+        checkpoint = RebuildJob.read_checkpoint(REBUILD_CHECKPOINT_FILE)
+        return bool(checkpoint) and checkpoint.get('disk_id') == disk_id and checkpoint.get('state') != 'completed'
+
+    def reconcile_disk(self, disk_id: str) -> bool:
+        """Registrar como sucios los bloques que los metadatos ponen en el disco y no tiene.
+
+        Usa la lista de bloques del nodo (``GET /blocks``); un nodo sin ella
+        solo se comprueba por el espacio usado. Devuelve False si no se pudo
+        obtener la lista (el disco sigue fuera y se reintenta).
+        """
+        disk_info = self.disk_nodes[disk_id]
+        try:
+            response = disk_info.pool.get("/", retries=0, probe=True)
+            response.raise_for_status()
+            if "list" not in response.json().get("features", []):
+                return True
+            response = disk_info.pool.get("/blocks", retries=0, probe=True)
+            response.raise_for_status()
+            stored = set(response.json().get("blocks", []))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"No se pudo obtener la lista de bloques del disco {disk_id}: {e}")
+            return False
+        missing = [ref for ref in self.metadata_store.blocks_on_disk(disk_id) if ref.block_id not in stored]
+        if missing:
+            print(f"Al disco {disk_id} le faltan {len(missing)} bloques; se regenerarán al resincronizarlo.")
+            self.dirty_log.mark_dirty(disk_id, missing)
+        return True
+
+    def verify_disk_data(self, disk_id: str, reported_used: int) -> bool:
+        """Comparar el espacio que informa el nodo con el que esperan los metadatos.
+
+        Si el nodo perdió sus bloques el disco pasa a ``failed``. Devuelve si
+        los datos parecen estar en el disco.
+        """
+        expected = self.metadata_store.disk_usage().get(disk_id, {}).get("bytes", 0)
+        # Los bloques escritos con el disco caído nunca llegaron a él
+        expected -= len(self.dirty_log.pending(disk_id)) * self.block_size
+        if expected > 0 and reported_used < expected * DISK_DATA_LOSS_RATIO:
+            print(f"Disco {disk_id} responde pero ha perdido sus datos; hay que reconstruirlo (POST /rebuild).")
+            self.disk_nodes[disk_id].status = "failed"
+            return False
+        return True
+
+    def close(self):
+        """Detener las colas de trabajo y cerrar las conexiones con los discos."""
+        self.health_checker.stop()
+        self.dirty_log.close()
+        self.dispatcher.shutdown(wait=False)
+        self.metadata_store.close()
+        for disk in self.disk_nodes.values():
+            if disk.pool:
+                disk.pool.close()
+
+    def get_pool_stats(self) -> Dict[str, Dict]:
+        """Estadísticas de los pools de conexiones de cada disco."""
+        return {disk_id: disk.pool.stats() for disk_id, disk in self.disk_nodes.items()}
+
+    def _rebuild_limits(self) -> Dict:
+        return {
+            "max_bytes_per_sec": REBUILD_MAX_BYTES_PER_SEC,
+            "max_iops": REBUILD_MAX_IOPS,
+            "parallel_stripes": REBUILD_PARALLEL_STRIPES,
+        }
+
+    def start_rebuild(self, disk_id: str, url: Optional[str] = None, force: bool = False) -> Dict:
+        """Reconstruir en segundo plano un disco caído sobre un nodo de reemplazo.
+
+        El nodo nuevo ocupa el lugar del disco (mismo disk_id); sin ``url`` se
+        reutiliza la dirección anterior (p. ej. el mismo nodo con un disco vacío).
+        Un disco en línea en la misma dirección solo se reconstruye con ``force``.
+        """
+        if disk_id not in self.disk_nodes:
+            raise ValueError(f"Disco desconocido: {disk_id}")
+        if self.rebuild_job and self.rebuild_job.is_running():
+            raise RuntimeError(f"Ya hay una reconstrucción en curso del disco {self.rebuild_job.disk_id}")
+        url = url or self.disk_nodes[disk_id].url
+        # Un nodo distinto sí se acepta: el estado del disco viejo puede no estar al día
+        if self.disk_nodes[disk_id].status == "online" and url == self.disk_nodes[disk_id].url and not force:
+            raise RuntimeError(
+                f"El disco {disk_id} está en línea; usa force para reconstruirlo igualmente"
+            )
+        self.rebuild_job = RebuildJob(self, disk_id, url, REBUILD_CHECKPOINT_FILE, **self._rebuild_limits())
+        self.rebuild_job.start()
+        return self.rebuild_job.progress()
+
+    def get_rebuild_progress(self) -> Optional[Dict]:
+        """Progreso de la última reconstrucción, o None si nunca se lanzó una."""
+        return self.rebuild_job.progress() if self.rebuild_job else None
+
+    def attach_replacement_disk(self, disk_id: str, url: str):
+        """Poner el nodo de reemplazo en el lugar del disco, en estado ``rebuilding``."""
+        previous = self.disk_nodes[disk_id]
+        if previous.pool and previous.url != url:
+            previous.pool.close()
+        replacement = DiskNodeInfo(
+            disk_id=disk_id,
+            url=url,
+            status="rebuilding",
+            total_space=previous.total_space,
+            used_space=0,
+            available_space=previous.total_space
+        )
+        replacement.open_pool(DISK_POOL_SIZE)
+        self.disk_nodes[disk_id] = replacement
+        # Las escrituras nuevas ya van al nodo de reemplazo: recordarlo tras un reinicio
+        self._save_disk_replacement(disk_id, url)
+
+    def recover_block(self, metadata: FileMetadata, block_id: str, disk_id: str) -> bytes:
+        """Regenerar un bloque con la paridad de su franja, sin pasar por la caché."""
+        return self._reconstruct_data(metadata, {block_id: disk_id}, {}, use_cache=False)[block_id]
+
+    def write_rebuilt_block(self, disk_id: str, block_id: str, data: bytes) -> bool:
+        return self._store_block_to_disk(disk_id, block_id, data)
+
+    def finish_rebuild(self, disk_id: str):
+        """El disco ya tiene todos sus bloques: vuelve a servir lecturas."""
+        self.disk_nodes[disk_id].status = "online"
+        print(f"Disco {disk_id} reconstruido por completo.")
+        # Bloques que fallaron mientras tanto (p. ej. escrituras con el nodo aún sin conectar)
+        self.start_resync(disk_id)
+
+    def abort_rebuild(self, disk_id: str):
+        """La reconstrucción no terminó: al disco le faltan bloques y solo vuelve con otra."""
+        self.disk_nodes[disk_id].status = "failed"
+        print(f"Disco {disk_id} reconstruido a medias; queda fuera de servicio hasta otro POST /rebuild.")
+
+    def get_latency_stats(self) -> Dict:
+        """Latencias de lectura por disco y lecturas cubiertas con la paridad."""
+        return self.latency.stats()
+
+    def get_cache_stats(self) -> Dict:
+        """Estadísticas de la caché de bloques y de la caché de archivos."""
+        return {"blocks": self.block_cache.stats(), "files": self.file_cache.stats()}
+
     def get_system_status(self) -> SystemStatus:
         """Obtener el estado general del sistema RAID 5."""
-        # Ping a cada nodo para obtener estado actualizado
+        # Estado y espacio según la última comprobación en segundo plano, sin peticiones
         total_disks = len(self.disk_nodes)
         available_disks = sum(1 for disk in self.disk_nodes.values() if disk.status == "online")
         failed_disks = total_disks - available_disks
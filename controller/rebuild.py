@@ -0,0 +1,311 @@
+"""Reconstrucción en segundo plano de un disco caído sobre un nodo de reemplazo."""
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from .metadata_store import stored_block_size
+from .schemas import FileMetadata
+from .stripe_index import DiskBlockRef
+
+if TYPE_CHECKING:
+    from .dirty_log import DirtyStripeLog
+    from .raid5 import RAID5Manager
+
+
+class TokenBucket:
+    """Limitador de ritmo: ``rate`` unidades por segundo con ráfagas de hasta ``capacity``.
+
+    Con ``rate <= 0`` no limita nada.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float):
+        """Bloquear hasta poder gastar ``amount`` unidades."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Se permite quedar en negativo: la espera salda la deuda
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RebuildJob:
+    """Regenera en un nodo de reemplazo todos los bloques de un disco caído.
+
+    - Mientras dura, el disco queda en estado ``rebuilding``: recibe las
+      escrituras nuevas pero las lecturas lo tratan como caído y reconstruyen
+      con la paridad.
+    - Obtiene los bloques del disco del índice inverso de metadatos y los
+      regenera en paralelo (``parallel_stripes`` hilos) con una ventana acotada
+      de bloques en vuelo que cruza de un archivo al siguiente, así muchos
+      archivos pequeños no se reconstruyen de uno en uno. Limita el ancho de
+      banda y las operaciones por segundo con un ``TokenBucket`` para no ahogar
+      las peticiones de clientes.
+    - Guarda el progreso en ``checkpoint_path`` (archivos terminados y franjas
+      hechas del archivo en curso); si el controlador se reinicia, el trabajo
+      continúa desde ahí.
+    - Si falla, el disco queda en ``failed`` (también tras reiniciar el
+      controlador) y solo vuelve con otro ``POST /rebuild``: le faltan bloques.
+    """
+
+    CHECKPOINT_EVERY = 1.0  # Segundos entre escrituras del checkpoint
+    WINDOW_PER_WORKER = 4  # Bloques en vuelo por hilo, para que ninguno quede esperando
+
+    def __init__(self, manager: "RAID5Manager", disk_id: str, url: str, checkpoint_path: str,
+                 max_bytes_per_sec: int, max_iops: int, parallel_stripes: int):
+        self.manager = manager
+        self.disk_id = disk_id
+        self.url = url
+        self.checkpoint_path = checkpoint_path
+        self.parallel_stripes = max(1, parallel_stripes)
+        self.bandwidth = TokenBucket(max_bytes_per_sec)
+        self.iops = TokenBucket(max_iops)
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.completed_files: List[str] = []
+        self.current_file: Optional[str] = None
+        self.current_stripe = 0  # Franjas ya hechas (en orden) del archivo en curso
+        self.total_blocks = 0
+        self.rebuilt_blocks = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._last_checkpoint = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def read_checkpoint(checkpoint_path: str) -> Optional[Dict]:
+        """Último checkpoint guardado, o None si no hay ninguno."""
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, 'r') as f:
+            return json.load(f)
+
+    @classmethod
+    def from_checkpoint(cls, manager: "RAID5Manager", checkpoint_path: str, **limits) -> Optional["RebuildJob"]:
+        """Recuperar un trabajo interrumpido, o None si no hay nada pendiente."""
+        checkpoint = cls.read_checkpoint(checkpoint_path)
+        if not checkpoint or checkpoint.get('state') != 'running':
+            return None
+        job = cls(manager, checkpoint['disk_id'], checkpoint['url'], checkpoint_path, **limits)
+        job.completed_files = checkpoint.get('completed_files', [])
+        job.current_file = checkpoint.get('current_file')
+        job.current_stripe = checkpoint.get('current_stripe', 0)
+        return job
+
+    def start(self):
+        self.state = "running"
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"tecmfs-rebuild-{self.disk_id}", daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self.state == "running"
+
+    def _run(self):
+        try:
+            self.manager.attach_replacement_disk(self.disk_id, self.url)
+            # El índice inverso da los bloques del disco sin recorrer todos los archivos
+            completed = set(self.completed_files)
+            pending: Dict[str, List[DiskBlockRef]] = {}
+            for ref in self.manager.blocks_on_disk(self.disk_id):
+                if ref.file_id in completed:
+                    continue
+                if ref.file_id == self.current_file and ref.stripe_index < self.current_stripe:
+                    continue
+                pending.setdefault(ref.file_id, []).append(ref)
+            self.total_blocks = sum(len(refs) for refs in pending.values())
+            self._write_checkpoint(force=True)
+            self._rebuild_pending(pending)
+            self.manager.finish_rebuild(self.disk_id)
+            self.state = "completed"
+        except Exception as e:
+            print(f"Error reconstruyendo el disco {self.disk_id}: {e}")
+            self.error = str(e)
+            self.state = "failed"
+            self.manager.abort_rebuild(self.disk_id)
+        finally:
+            self.finished_at = time.monotonic()
+            self._write_checkpoint(force=True)
+
+    def _rebuild_pending(self, pending: Dict[str, List[DiskBlockRef]]):
+        """Regenerar los bloques pendientes, en orden de archivo y de franja.
+
+        Se encolan hasta ``parallel_stripes * WINDOW_PER_WORKER`` bloques sin
+        esperar a que termine un archivo para empezar el siguiente, y se esperan
+        en el mismo orden: el checkpoint solo avanza sobre bloques terminados, y
+        un archivo pasa a ``completed_files`` cuando han terminado todos los suyos.
+        """
+        window = self.parallel_stripes * self.WINDOW_PER_WORKER
+        # (archivo, bloque, último del archivo, futuro); sin futuro si el archivo se borró
+        in_flight: Deque[Tuple[str, Optional[DiskBlockRef], bool, Optional[Future]]] = deque()
+        with ThreadPoolExecutor(max_workers=self.parallel_stripes,
+                                thread_name_prefix=f"tecmfs-rebuild-{self.disk_id}") as executor:
+            try:
+                for file_id, refs in pending.items():
+                    metadata = self.manager.get_file(file_id)
+                    if metadata is None:
+                        in_flight.append((file_id, None, True, None))
+                        continue
+                    # Copia de trabajo: el índice de franjas que construye la reconstrucción
+                    # se descarta con ella en lugar de quedarse en los metadatos del almacén
+                    metadata = metadata.model_copy()
+                    for i, ref in enumerate(refs):
+                        while len(in_flight) >= window:
+                            self._finish_oldest(in_flight)
+                        future = executor.submit(self._rebuild_block, metadata, ref)
+                        in_flight.append((file_id, ref, i == len(refs) - 1, future))
+                while in_flight:
+                    self._finish_oldest(in_flight)
+            except Exception:
+                for _, _, _, future in in_flight:
+                    if future is not None:
+                        future.cancel()
+                raise
+
+    def _finish_oldest(self, in_flight: Deque):
+        """Esperar el bloque más antiguo en vuelo y avanzar el checkpoint."""
+        file_id, ref, last, future = in_flight.popleft()
+        if future is not None:
+            future.result()
+        if last:
+            self.completed_files.append(file_id)
+            self.current_file = None
+            self.current_stripe = 0
+        else:
+            self.current_file = file_id
+            self.current_stripe = ref.stripe_index + 1
+        self._write_checkpoint()
+
+    def _rebuild_block(self, metadata: FileMetadata, ref: DiskBlockRef):
+        if self.manager.get_file(metadata.file_id) is None:
+            return  # El archivo se borró durante la reconstrucción
+        siblings = len(metadata.stripe_index()[ref.stripe_index].all_blocks()) - 1
+        # Lecturas de los hermanos + la escritura en el disco nuevo
+        self.iops.consume(siblings + 1)
+        self.bandwidth.consume((siblings + 1) * stored_block_size(metadata))
+        block_data = self.manager.recover_block(metadata, ref.block_id, self.disk_id)
+        if not self.manager.write_rebuilt_block(self.disk_id, ref.block_id, block_data):
+            raise Exception(f"No se pudo escribir el bloque {ref.block_id} en el disco de reemplazo")
+        with self._lock:
+            self.rebuilt_blocks += 1
+
+    def _write_checkpoint(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint < self.CHECKPOINT_EVERY:
+            return
+        self._last_checkpoint = now
+        checkpoint = {
+            'disk_id': self.disk_id,
+            'url': self.url,
+            'state': self.state,
+            'completed_files': self.completed_files,
+            'current_file': self.current_file,
+            'current_stripe': self.current_stripe,
+        }
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def progress(self) -> Dict:
+        """Estado del trabajo, bloques por segundo y tiempo restante estimado."""
+        with self._lock:
+            rebuilt = self.rebuilt_blocks
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        blocks_per_sec = rebuilt / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total_blocks - rebuilt)
+        return {
+            "disk_id": self.disk_id,
+            "url": self.url,
+            "state": self.state,
+            "total_blocks": self.total_blocks,
+            "rebuilt_blocks": rebuilt,
+            "blocks_per_sec": round(blocks_per_sec, 2),
+            "eta_seconds": round(remaining / blocks_per_sec, 1) if blocks_per_sec > 0 else None,
+            "elapsed_seconds": round(elapsed, 1),
+            "error": self.error,
+        }
+
+
+class ResyncJob:
+    """Regenera en un disco que vuelve solo los bloques de su registro de franjas sucias.
+
+    Usa los mismos límites de ritmo que ``RebuildJob``. Si una escritura falla
+    (el disco volvió a caer) se detiene y deja pendientes los bloques que
+    faltan; se reintenta la próxima vez que el disco vuelva.
+    """
+
+    CLEAN_BATCH = 64  # Bloques regenerados por cada escritura del registro
+
+    def __init__(self, manager: "RAID5Manager", disk_id: str, dirty_log: "DirtyStripeLog",
+                 max_bytes_per_sec: int, max_iops: int, parallel_stripes: int):
+        self.manager = manager
+        self.disk_id = disk_id
+        self.dirty_log = dirty_log
+        self.parallel_stripes = max(1, parallel_stripes)
+        self.bandwidth = TokenBucket(max_bytes_per_sec)
+        self.iops = TokenBucket(max_iops)
+        self.state = "pending"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.state = "running"
+        self._thread = threading.Thread(target=self._run, name=f"tecmfs-resync-{self.disk_id}", daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self.state == "running"
+
+    def _run(self):
+        refs = self.dirty_log.pending(self.disk_id)
+        print(f"Resincronizando {len(refs)} bloques del disco {self.disk_id}...")
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel_stripes,
+                                    thread_name_prefix=f"tecmfs-resync-{self.disk_id}") as executor:
+                for start in range(0, len(refs), self.CLEAN_BATCH):
+                    batch = refs[start:start + self.CLEAN_BATCH]
+                    done = [block_id for block_id in executor.map(self._resync_block, batch) if block_id]
+                    self.dirty_log.mark_clean(self.disk_id, done)
+                    if len(done) < len(batch):
+                        raise Exception(f"el disco {self.disk_id} dejó de responder")
+            self.state = "completed"
+            print(f"Disco {self.disk_id} resincronizado.")
+        except Exception as e:
+            print(f"Error resincronizando el disco {self.disk_id}: {e}")
+            self.state = "failed"
+
+    def _resync_block(self, ref: DiskBlockRef) -> Optional[str]:
+        """Regenerar un bloque; devuelve su ID si ya no está pendiente."""
+        metadata = self.manager.get_file(ref.file_id)
+        if metadata is None:
+            return ref.block_id  # El archivo se borró: no hay nada que regenerar
+        siblings = len(metadata.stripe_index()[ref.stripe_index].all_blocks()) - 1
+        self.iops.consume(siblings + 1)
+        self.bandwidth.consume((siblings + 1) * stored_block_size(metadata))
+        try:
+            block_data = self.manager.recover_block(metadata, ref.block_id, self.disk_id)
+        except Exception as e:
+            print(f"No se pudo regenerar el bloque {ref.block_id}: {e}")
+            return None
+        if not self.manager.write_rebuilt_block(self.disk_id, ref.block_id, block_data):
+            return None
+        return ref.block_id
@@ -0,0 +1,130 @@
+"""Timeouts adaptativos, reintentos con espera aleatoria y cortocircuito por disco."""
+import random
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El cortocircuito del disco está abierto: se falla sin llegar a hacer la petición.
+
+    Hereda de ``ConnectionError`` para que los manejadores existentes de
+    ``RequestException`` lo traten como cualquier otro fallo de conexión.
+    """
+
+
+class AdaptiveTimeout:
+    """Timeout calculado a partir de la latencia reciente de un disco.
+
+    Sigue el cálculo del RTO de TCP: media móvil exponencial (EWMA) de la
+    latencia más ``deviations`` veces su desviación media, acotado entre
+    ``min_timeout`` y ``max_timeout``. Cada timeout agotado duplica el valor
+    (hasta el máximo) hasta la siguiente respuesta correcta.
+    """
+
+    ALPHA = 0.125  # Peso de cada muestra en la media
+    BETA = 0.25  # Peso de cada muestra en la desviación
+
+    def __init__(self, initial: float, min_timeout: float, max_timeout: float,
+                 connect_timeout: float, deviations: float = 4.0):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.connect_timeout = connect_timeout
+        self.deviations = deviations
+        self._initial = min(max(initial, min_timeout), max_timeout)
+        self._srtt: Optional[float] = None
+        self._rttvar = 0.0
+        self._backoff = 1.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Añadir la latencia de una respuesta correcta."""
+        with self._lock:
+            if self._srtt is None:
+                self._srtt = seconds
+                self._rttvar = seconds / 2
+            else:
+                self._rttvar += self.BETA * (abs(self._srtt - seconds) - self._rttvar)
+                self._srtt += self.ALPHA * (seconds - self._srtt)
+            self._backoff = 1.0
+
+    def record_timeout(self):
+        """Un timeout agotado: alargar los siguientes por si el disco solo va lento."""
+        with self._lock:
+            # Sin muestras el timeout inicial ya es holgado: no se alarga más
+            if self._srtt is not None:
+                self._backoff = min(self._backoff * 2, self.max_timeout / self.min_timeout)
+
+    def current(self) -> float:
+        """Timeout de lectura actual, en segundos."""
+        with self._lock:
+            if self._srtt is None:
+                base = self._initial
+            else:
+                base = self._srtt + self.deviations * self._rttvar
+            return min(max(base * self._backoff, self.min_timeout), self.max_timeout)
+
+    def timeouts(self) -> Tuple[float, float]:
+        """Par ``(connect, read)`` para ``requests``; conectar nunca espera más que leer."""
+        read = self.current()
+        return min(self.connect_timeout, read), read
+
+    def smoothed(self) -> Optional[float]:
+        with self._lock:
+            return self._srtt
+
+
+class CircuitBreaker:
+    """Cortocircuito de un disco: ``closed`` -> ``open`` -> ``half_open`` -> ``closed``.
+
+    - Tras ``failure_threshold`` fallos seguidos se abre y las peticiones fallan
+      al momento en lugar de esperar un timeout completo cada una.
+    - Pasados ``reset_timeout`` segundos deja pasar una sola petición de prueba:
+      si responde se cierra, y si falla vuelve a abrirse.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opens = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Decidir si una petición puede salir hacia el disco."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opens += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Espera antes del reintento ``attempt`` (desde 1): exponencial con jitter completo."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
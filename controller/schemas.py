@@ -1,15 +1,86 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from pydantic import BaseModel, PrivateAttr
+from typing import Iterator, List, Optional, Dict, Tuple
 from datetime import datetime
 
+from .connection_pool import DiskConnectionPool
+from .layout import LAYOUT_VERSION, BlockLocation, disk_block_counts, iter_stripe_locations
+from .stripe_index import StripeIndex
+
+class StripeLayout(BaseModel):
+    """Descriptor compacto de las franjas de un archivo; las ubicaciones se calculan"""
+    version: int = LAYOUT_VERSION
+    first_stripe: int  # Número global de la primera franja (define la rotación de paridad)
+    stripe_count: int
+    block_size: int
+    data_disks: int
+    # Franjas colocadas fuera de la rotación por espacio o carga: índice -> [discos de datos..., paridad]
+    disk_map: Dict[int, List[int]] = {}
+    # Discos del arreglo al escribir el archivo; vacío en layouts anteriores (disk_1..disk_N)
+    disks: List[str] = []
+
 class FileMetadata(BaseModel):
     """Modelo para metadatos de archivos"""
     file_id: str
     filename: str
     size: int
     uploaded_at: str
-    blocks: Dict[str, str]  # Mapeo de block_id a disk_id
-    parity_blocks: Dict[str, str]  # Mapeo de parity_block_id a disk_id
+    # Mapas por bloque: solo los archivos antiguos, sin layout, los guardan
+    blocks: Dict[str, str] = {}  # Mapeo de block_id a disk_id
+    parity_blocks: Dict[str, str] = {}  # Mapeo de parity_block_id a disk_id
+    layout: Optional[StripeLayout] = None
+    # Índice inverso del archivo: disk_id -> bloques en ese disco (se calcula al registrarlo)
+    disk_blocks: Dict[str, int] = {}
+    _stripe_index: Optional[StripeIndex] = PrivateAttr(default=None)
+
+    def stripe_index(self) -> StripeIndex:
+        """Índice de franjas del archivo, construido la primera vez que se pide"""
+        if self._stripe_index is None:
+            self._stripe_index = self.build_stripe_index()
+        return self._stripe_index
+
+    def build_stripe_index(self) -> StripeIndex:
+        """Índice de franjas sin guardarlo en el objeto, para recorrer todos los archivos"""
+        if self._stripe_index is not None:
+            return self._stripe_index
+        if self.layout is None:
+            return StripeIndex.from_block_maps(self.blocks, self.parity_blocks)
+        return StripeIndex.from_layout(self.iter_stripes())
+
+    def disk_block_counts(self) -> Dict[str, int]:
+        """Bloques del archivo en cada disco, sin construir el índice de franjas"""
+        if not self.disk_blocks:
+            if self.layout is None:
+                counts: Dict[str, int] = {}
+                for disk_id in list(self.blocks.values()) + list(self.parity_blocks.values()):
+                    counts[disk_id] = counts.get(disk_id, 0) + 1
+                self.disk_blocks = counts
+            else:
+                self.disk_blocks = disk_block_counts(
+                    self.size, self.layout.first_stripe, self.layout.stripe_count,
+                    self.layout.block_size, self.layout.data_disks,
+                    self.layout.disk_map, self.layout.disks
+                )
+        return self.disk_blocks
+
+    def iter_stripes(self) -> Iterator[Tuple[int, List[BlockLocation], BlockLocation]]:
+        """Franjas del archivo calculadas a partir del layout"""
+        return iter_stripe_locations(
+            self.file_id, self.size, self.layout.first_stripe, self.layout.stripe_count,
+            self.layout.block_size, self.layout.data_disks,
+            self.layout.disk_map, self.layout.disks
+        )
+
+    def block_locations(self) -> Dict[str, str]:
+        """Mapeo de block_id a disk_id de los bloques de datos"""
+        if self.layout is None:
+            return self.blocks
+        return {block_id: disk_id for entry in self.stripe_index() for block_id, disk_id in entry.data_blocks}
+
+    def parity_locations(self) -> Dict[str, str]:
+        """Mapeo de block_id a disk_id de los bloques de paridad"""
+        if self.layout is None:
+            return self.parity_blocks
+        return {block_id: disk_id for _, _, (block_id, disk_id) in self.stripe_index()}
 
 class SystemStatus(BaseModel):
     """Modelo para el estado del sistema RAID 5"""
@@ -45,6 +116,99 @@ class DiskNodeInfo(BaseModel):
     total_space: int
     used_space: int
     available_space: int
+    binary_transport: Optional[bool] = None  # None hasta consultar las capacidades del nodo
+    _pool: Optional[DiskConnectionPool] = PrivateAttr(default=None)
+
+    def open_pool(self, pool_size: int) -> DiskConnectionPool:
+        """Crear (una sola vez) el pool de conexiones keep-alive hacia este nodo"""
+        if self._pool is None:
+            self._pool = DiskConnectionPool(self.url, pool_size)
+        return self._pool
+
+    @property
+    def pool(self) -> Optional[DiskConnectionPool]:
+        return self._pool
+
+class ConnectionPoolStats(BaseModel):
+    """Modelo para las estadísticas del pool de conexiones de un disco"""
+    pool_size: int
+    requests: int
+    connections_created: int
+    open_connections: int
+    active_requests: int
+    reuse_ratio: float
+    latency_ewma_ms: Optional[float] = None
+    timeout_ms: float
+    retries: int
+    circuit_state: str  # "closed", "open" o "half_open"
+    circuit_opens: int
+    fast_failures: int
+
+class BlockCacheStats(BaseModel):
+    """Modelo para las estadísticas de la caché de bloques del controlador"""
+    max_bytes: int
+    used_bytes: int
+    blocks: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+class FileCacheStats(BaseModel):
+    """Modelo para las estadísticas de la caché de archivos reconstruidos"""
+    max_bytes: int
+    used_bytes: int
+    files: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+class CacheStats(BaseModel):
+    """Modelo para el estado de las cachés del controlador"""
+    blocks: BlockCacheStats
+    files: FileCacheStats
+
+class DiskLatency(BaseModel):
+    """Modelo para los percentiles de latencia de lectura de un disco"""
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+class LatencyStats(BaseModel):
+    """Modelo para las latencias de lectura y las lecturas cubiertas con paridad"""
+    disks: Dict[str, DiskLatency]
+    hedge_delay_ms: Optional[float] = None
+    hedges: int
+    hedges_won: int  # Veces que la reconstrucción llegó antes que el bloque rezagado
+
+class DiskUsage(BaseModel):
+    """Modelo para la ocupación de un disco según los metadatos"""
+    status: str
+    dirty_blocks: int  # Bloques escritos con el disco caído, pendientes de resincronizar
+    blocks: int
+    used_bytes: int
+    total_space: int
+    reported_used_space: int  # Último espacio usado informado por el nodo
+    queue_depth: int  # Operaciones encoladas o en curso en el despachador
+
+class RebuildRequest(BaseModel):
+    """Modelo para lanzar la reconstrucción de un disco caído"""
+    disk_id: str
+    url: Optional[str] = None  # Nodo de reemplazo; por defecto, la misma dirección
+    force: bool = False  # Reconstruir aunque el disco esté en línea (p. ej. volvió vacío)
+
+class RebuildProgress(BaseModel):
+    """Modelo para el progreso de una reconstrucción de disco"""
+    disk_id: str
+    url: str
+    state: str  # 'running', 'completed' o 'failed'
+    total_blocks: int
+    rebuilt_blocks: int
+    blocks_per_sec: float
+    eta_seconds: Optional[float] = None
+    elapsed_seconds: float
+    error: Optional[str] = None
 
 class BlockStatus(BaseModel):
     block_id: str
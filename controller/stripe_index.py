@@ -0,0 +1,83 @@
+"""Índice de franjas de un archivo: franja -> bloques de datos ordenados + paridad."""
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from .layout import BlockLocation
+
+
+class StripeEntry(NamedTuple):
+    """Bloques de una franja en el orden en que forman los datos"""
+    index: int
+    data_blocks: List[BlockLocation]
+    parity: Optional[BlockLocation]
+
+    def all_blocks(self) -> List[BlockLocation]:
+        """Bloques de datos y de paridad de la franja"""
+        return self.data_blocks + ([self.parity] if self.parity else [])
+
+
+class DiskBlockRef(NamedTuple):
+    """Referencia a un bloque guardado en un disco, para el índice inverso por disco"""
+    file_id: str
+    stripe_index: int
+    block_id: str
+
+
+class StripeIndex:
+    """Índice construido una vez por archivo para lecturas y reconstrucciones.
+
+    Evita ordenar IDs como cadenas (que rompe el orden a partir de la franja 10)
+    y volver a parsear ``block_id.split('_')`` por cada bloque o fallo.
+    """
+
+    def __init__(self, stripes: List[StripeEntry]):
+        self.stripes = stripes
+        # block_id -> número de franja, para localizar bloques fallidos
+        self._stripe_of: Dict[str, int] = {
+            block_id: entry.index for entry in stripes for block_id, _ in entry.all_blocks()
+        }
+
+    @classmethod
+    def from_layout(cls, stripe_locations) -> "StripeIndex":
+        """Construir el índice a partir de las ubicaciones calculadas por el layout."""
+        return cls([
+            StripeEntry(stripe_index, data_blocks, parity)
+            for stripe_index, data_blocks, parity in stripe_locations
+        ])
+
+    @classmethod
+    def from_block_maps(cls, blocks: Dict[str, str], parity_blocks: Dict[str, str]) -> "StripeIndex":
+        """Construir el índice desde los mapas por bloque de archivos antiguos.
+
+        Cada ID se parsea una sola vez: ``<file_id>_block_<franja>_<bloque>`` o
+        ``<file_id>_block_parity_<franja>``.
+        """
+        data: Dict[int, List] = {}
+        parity: Dict[int, BlockLocation] = {}
+        for block_id, disk_id in blocks.items():
+            stripe_index, block_index = block_id.split('_')[-2:]
+            data.setdefault(int(stripe_index), []).append((int(block_index), block_id, disk_id))
+        for block_id, disk_id in parity_blocks.items():
+            parity[int(block_id.split('_')[-1])] = (block_id, disk_id)
+
+        stripe_count = max(list(data) + list(parity), default=-1) + 1
+        return cls([
+            StripeEntry(
+                stripe_index,
+                [(block_id, disk_id) for _, block_id, disk_id in sorted(data.get(stripe_index, []))],
+                parity.get(stripe_index)
+            )
+            for stripe_index in range(stripe_count)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.stripes)
+
+    def __getitem__(self, stripe_index: int) -> StripeEntry:
+        return self.stripes[stripe_index]
+
+    def __iter__(self) -> Iterator[StripeEntry]:
+        return iter(self.stripes)
+
+    def stripe_of(self, block_id: str) -> Optional[int]:
+        """Número de franja de un bloque, o None si no pertenece al archivo"""
+        return self._stripe_of.get(block_id)
@@ -1,10 +1,13 @@
 import fastapi
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 import os
 import binascii
 import argparse
+import uuid
 import xml.etree.ElementTree as ET
 from threading import Lock
 
@@ -21,6 +24,12 @@ class DiskConfig:
 
 config = DiskConfig()
 
+# Block transports and optional endpoints supported by this node, advertised on the root endpoint
+FEATURES = ["hex", "binary", "list"]
+
+# Changes on every start, so the controller can tell the node restarted between two checks
+BOOT_ID = uuid.uuid4().hex
+
 # --- Pydantic model for storing data ---
 class StoreData(BaseModel):
     block_id: str
@@ -61,52 +70,84 @@ def read_root():
         "storage_path": config.storage_path,
         "capacity_bytes": config.capacity_bytes,
         "used_space_bytes": config.used_space_bytes,
-        "available_space_bytes": config.capacity_bytes - config.used_space_bytes
+        "available_space_bytes": config.capacity_bytes - config.used_space_bytes,
+        "features": FEATURES,
+        "boot_id": BOOT_ID
     }
 
-@app.post("/store", status_code=201)
-async def store_block(payload: StoreData):
-    """Stores a block of data, checking for available space first."""
-    try:
-        data_bytes = binascii.unhexlify(payload.data)
-        block_size = len(data_bytes)
+def write_block(block_id: str, data_bytes: bytes):
+    """Writes a block to storage, checking for available space first."""
+    block_size = len(data_bytes)
 
-        with config.lock:
-            # Check for available space
-            if config.used_space_bytes + block_size > config.capacity_bytes:
-                raise HTTPException(
-                    status_code=507, 
-                    detail="Insufficient storage space on this disk node."
-                )
-
-            block_path = os.path.join(config.storage_path, payload.block_id)
+    with config.lock:
+        # Check for available space
+        if config.used_space_bytes + block_size > config.capacity_bytes:
+            raise HTTPException(
+                status_code=507, 
+                detail="Insufficient storage space on this disk node."
+            )
+
+        block_path = os.path.join(config.storage_path, block_id)
+        try:
             with open(block_path, "wb") as f:
                 f.write(data_bytes)
-            
-            # Update used space
-            config.used_space_bytes += block_size
-
-        return {"message": "Block stored successfully", "block_id": payload.block_id}
-    except binascii.Error as e:
-        raise HTTPException(status_code=400, detail=f"Invalid hex data: {e}")
-    except IOError as e:
-        raise HTTPException(status_code=500, detail=f"Could not write to block file: {e}")
+        except IOError as e:
+            raise HTTPException(status_code=500, detail=f"Could not write to block file: {e}")
+        
+        # Update used space
+        config.used_space_bytes += block_size
 
-@app.get("/retrieve/{block_id}")
-async def retrieve_block(block_id: str):
-    """Retrieves a block of data by its ID."""
+def read_block(block_id: str) -> bytes:
+    """Reads a block from storage."""
     block_path = os.path.join(config.storage_path, block_id)
     if not os.path.exists(block_path):
         raise HTTPException(status_code=404, detail="Block not found")
     try:
         with open(block_path, "rb") as f:
-            data = f.read()
-        return {"block_id": block_id, "data": binascii.hexlify(data).decode()}
+            return f.read()
     except IOError as e:
         raise HTTPException(status_code=500, detail=f"Could not read block file: {e}")
 
+@app.post("/store", status_code=201)
+def store_block(payload: StoreData):
+    """Stores a hex-encoded block of data."""
+    try:
+        data_bytes = binascii.unhexlify(payload.data)
+    except binascii.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid hex data: {e}")
+    write_block(payload.block_id, data_bytes)
+    return {"message": "Block stored successfully", "block_id": payload.block_id}
+
+@app.post("/store/{block_id}", status_code=201)
+async def store_block_binary(block_id: str, request: Request):
+    """Stores a block sent as a raw application/octet-stream body."""
+    data_bytes = await request.body()
+    # File I/O runs in the threadpool so the event loop keeps serving requests
+    await run_in_threadpool(write_block, block_id, data_bytes)
+    return {"message": "Block stored successfully", "block_id": block_id}
+
+@app.get("/retrieve/{block_id}")
+def retrieve_block(block_id: str):
+    """Retrieves a block of data by its ID as hex inside JSON."""
+    data = read_block(block_id)
+    return {"block_id": block_id, "data": binascii.hexlify(data).decode()}
+
+@app.get("/retrieve/{block_id}/raw")
+def retrieve_block_binary(block_id: str):
+    """Retrieves a block of data by its ID as a raw application/octet-stream body."""
+    data = read_block(block_id)
+    return Response(content=data, media_type="application/octet-stream")
+
+@app.get("/blocks")
+def list_blocks():
+    """Lists the IDs of all blocks stored on this node."""
+    try:
+        return {"blocks": [entry.name for entry in os.scandir(config.storage_path) if entry.is_file()]}
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Could not list blocks: {e}")
+
 @app.delete("/delete/{block_id}", status_code=200)
-async def delete_block(block_id: str):
+def delete_block(block_id: str):
     """Deletes a block of data by its ID."""
     block_path = os.path.join(config.storage_path, block_id)
     if not os.path.exists(block_path):